@@ -1,14 +0,0 @@
-"""
-Ableton Template Generator
-A tool for generating Ableton Live templates based on musical genres.
-"""
-
-from . import models
-from . import services
-from . import repositories
-from . import config
-from . import utils
-
-__version__ = "0.1.0"
-__author__ = "Luis Valencia"
-__email__ = "levm38@outlook.com"
@@ -0,0 +1 @@
+"""Offline performance benchmarks for the template generator."""
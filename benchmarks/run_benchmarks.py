@@ -0,0 +1,366 @@
+"""Benchmarks for template loading, merging, pattern loading, variation,
+performance rendering, export and CLI startup.
+
+Everything runs offline on seeded synthetic data from generate_corpus. Each
+stage is measured at several input sizes, recording wall time over a few
+runs and peak traced memory of one extra run. Results are written as JSON
+so that two runs can be compared:
+
+    python -m benchmarks.run_benchmarks run --output before.json
+    python -m benchmarks.run_benchmarks run --output after.json
+    python -m benchmarks.run_benchmarks compare before.json after.json
+
+The startup command checks the CLI's import time against a fixed budget:
+
+    python -m benchmarks.run_benchmarks startup
+"""
+
+from dataclasses import replace
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import click
+import numpy as np
+
+from ableton_template_generator.repositories.template_repository import TemplateRepository
+from ableton_template_generator.repositories.pattern_repository import PatternRepository
+from ableton_template_generator.services.template_service import TemplateService
+from ableton_template_generator.models.midi_pattern import PatternVariation
+from ableton_template_generator.export.als_exporter import AlsExporter
+from ableton_template_generator.export.clip_index import ClipIndex
+from ableton_template_generator.export.performance import render_performances
+
+import generate_corpus
+from generate_corpus import CorpusSpec
+
+# Input sizes per stage; "large" is meant to be well beyond production sets
+SIZES: Dict[str, Dict[str, int]] = {
+    'small': {
+        'groups': 4, 'tracks_per_group': 4, 'markers': 8, 'templates': 2,
+        'instruments': 4, 'clips_per_instrument': 4, 'notes_per_clip': 32,
+        'variations': 1000, 'repeat': 5
+    },
+    'medium': {
+        'groups': 16, 'tracks_per_group': 16, 'markers': 64, 'templates': 8,
+        'instruments': 16, 'clips_per_instrument': 16, 'notes_per_clip': 256,
+        'variations': 4000, 'repeat': 3
+    },
+    'large': {
+        'groups': 64, 'tracks_per_group': 64, 'markers': 512, 'templates': 16,
+        'instruments': 32, 'clips_per_instrument': 16, 'notes_per_clip': 2048,
+        'variations': 4000, 'repeat': 1
+    },
+}
+
+SEED = 1234
+
+# The CLI module must import within STARTUP_BUDGET_MS, and without any of
+# STARTUP_EXCLUDED: those are for the commands that use them to import
+STARTUP_MODULE = 'ableton_template_generator.cli.main'
+STARTUP_BUDGET_MS = 60.0
+STARTUP_EXCLUDED = (
+    'numpy', 'rich', 'requests', 'yaml',
+    'ableton_template_generator.models',
+    'ableton_template_generator.services',
+    'ableton_template_generator.export',
+)
+
+# A stage builds (setup, run) for a size: setup creates fresh inputs for
+# every run, and only run is measured
+Stage = Callable[[Dict[str, int], Path], Tuple[Callable[[], Any], Callable[[Any], Any]]]
+
+def _template_repository(work_dir: Path) -> TemplateRepository:
+    return TemplateRepository(str(work_dir / "templates"))
+
+def _corpus_spec(size: Dict[str, int]) -> CorpusSpec:
+    # Flat templates and note-only clips, so each stage scales with its own sizes
+    return CorpusSpec(
+        groups_per_template=size['groups'], subgroup_depth=0, tracks_per_group=size['tracks_per_group'],
+        markers_per_template=size['markers'], clips_per_track=size['clips_per_instrument'],
+        notes_per_clip=size['notes_per_clip'], ccs_per_clip=0, automations_per_clip=0, seed=SEED
+    )
+
+def _patterns_data(rng: np.random.Generator, instruments: int, spec: CorpusSpec) -> Dict[str, Any]:
+    return generate_corpus.patterns_dict(rng, [f"Track {i}" for i in range(instruments)], spec)
+
+def stage_template_deserialize(size: Dict[str, int], work_dir: Path):
+    repository = _template_repository(work_dir)
+    data = generate_corpus.template_dict(np.random.default_rng(SEED), "bench", _corpus_spec(size))
+    return (lambda: data), repository._deserialize_template
+
+def stage_merge(size: Dict[str, int], work_dir: Path):
+    repository = _template_repository(work_dir)
+    service = TemplateService(repository)
+    rng = np.random.default_rng(SEED)
+    spec = _corpus_spec(size)
+    templates = [
+        repository._deserialize_template(generate_corpus.template_dict(rng, f"genre{i}", spec))
+        for i in range(size['templates'])
+    ]
+    return (lambda: templates), service.merge_templates
+
+def stage_pattern_deserialize(size: Dict[str, int], work_dir: Path):
+    repository = PatternRepository(str(work_dir / "patterns"))
+    data = _patterns_data(np.random.default_rng(SEED), size['instruments'], _corpus_spec(size))
+    return (lambda: data), repository._deserialize_patterns
+
+def _pattern_load_stage(size: Dict[str, int], work_dir: Path, binary: bool):
+    patterns_dir = work_dir / "patterns"
+    patterns_dir.mkdir()
+    data = _patterns_data(np.random.default_rng(SEED), size['instruments'], _corpus_spec(size))
+    with open(patterns_dir / "bench_patterns.json", 'w') as f:
+        json.dump(data, f)
+    if binary:
+        PatternRepository(str(patterns_dir)).convert_to_binary("bench")
+    # A new repository per run, so nothing is cached
+    return (lambda: PatternRepository(str(patterns_dir))), (lambda repository: repository.load_patterns("bench"))
+
+def stage_pattern_load_json(size: Dict[str, int], work_dir: Path):
+    return _pattern_load_stage(size, work_dir, binary=False)
+
+def stage_pattern_load_binary(size: Dict[str, int], work_dir: Path):
+    return _pattern_load_stage(size, work_dir, binary=True)
+
+def stage_variations(size: Dict[str, int], work_dir: Path):
+    repository = PatternRepository(str(work_dir / "patterns"))
+    data = _patterns_data(np.random.default_rng(SEED), 1, replace(_corpus_spec(size), clips_per_track=1))
+    base = next(iter(repository._deserialize_patterns(data).values()))[0].pattern
+    variation = PatternVariation(base, "combination", 0.5, preserve_rhythm=False, seed=SEED)
+    return (lambda: variation), (lambda variation: variation.generate_batch(size['variations']))
+
+def stage_perform(size: Dict[str, int], work_dir: Path):
+    repository = PatternRepository(str(work_dir / "patterns"))
+    data = _patterns_data(np.random.default_rng(SEED), size['instruments'], _corpus_spec(size))
+    patterns = [clip.pattern for clips in repository._deserialize_patterns(data).values() for clip in clips]
+    for pattern in patterns:
+        pattern.swing_amount = pattern.groove_amount = 0.5
+        pattern.velocity_variation = 0.2
+        pattern.timing_variation = 0.01
+    return (lambda: patterns), render_performances
+
+def stage_export(size: Dict[str, int], work_dir: Path, workers: int = 1):
+    rng = np.random.default_rng(SEED)
+    spec = _corpus_spec(size)
+    repository = _template_repository(work_dir)
+    template = repository._deserialize_template(generate_corpus.template_dict(rng, "bench", spec))
+
+    # Spread the same number of notes as the pattern stage over the tracks
+    tracks = [(group, track) for group in template.groups for track in group.tracks]
+    total_clips = size['instruments'] * size['clips_per_instrument']
+    clips_data = {"patterns": {"all": {"clips": [
+        generate_corpus.clip_dict(rng, f"{group.name} - {track.name} {c}", c, spec)
+        for c in range(total_clips)
+        for group, track in [tracks[c % len(tracks)]]
+    ]}}}
+    clips = ClipIndex()
+    for c, clip in enumerate(PatternRepository()._deserialize_patterns(clips_data)["all"]):
+        group, track = tracks[c % len(tracks)]
+        clips.add(group.name, track.name, [clip])
+
+    output_path = work_dir / "export" / "bench.als"
+    exporter = AlsExporter(workers=workers)
+    return (lambda: None), (lambda _: exporter.export(template, clips, output_path))
+
+def stage_export_parallel(size: Dict[str, int], work_dir: Path):
+    return stage_export(size, work_dir, workers=os.cpu_count() or 1)
+
+def stage_cli_startup(size: Dict[str, int], work_dir: Path):
+    command = [sys.executable, '-m', STARTUP_MODULE, '--help']
+    return (lambda: None), (lambda _: subprocess.run(command, check=True, stdout=subprocess.DEVNULL))
+
+STAGES: Dict[str, Stage] = {
+    'template_deserialize': stage_template_deserialize,
+    'merge': stage_merge,
+    'pattern_deserialize': stage_pattern_deserialize,
+    'pattern_load_json': stage_pattern_load_json,
+    'pattern_load_binary': stage_pattern_load_binary,
+    'variations': stage_variations,
+    'perform': stage_perform,
+    'export': stage_export,
+    'export_parallel': stage_export_parallel,
+    'cli_startup': stage_cli_startup,
+}
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> Dict[str, Any]:
+    """Time run over fresh inputs, then trace the peak memory of one more run"""
+    times = []
+    for _ in range(repeat):
+        inputs = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(inputs)
+        times.append(time.perf_counter() - start)
+
+    inputs = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_seconds_min': min(times),
+        'wall_seconds_median': statistics.median(times),
+        'wall_seconds_all': times,
+        'peak_memory_bytes': peak
+    }
+
+def run_benchmarks(stages: List[str], sizes: List[str], repeat: int = 0,
+                   echo: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run the selected stages at the selected sizes"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="atg-bench-") as temp_dir:
+        for size_name in sizes:
+            size = SIZES[size_name]
+            for stage_name in stages:
+                work_dir = Path(temp_dir) / f"{stage_name}-{size_name}"
+                work_dir.mkdir()
+                setup, run = STAGES[stage_name](size, work_dir)
+                measurement = measure(setup, run, repeat or size['repeat'])
+                echo(f"{stage_name:22} {size_name:8} "
+                     f"{measurement['wall_seconds_median'] * 1000:10.2f} ms "
+                     f"{measurement['peak_memory_bytes'] / 1024 / 1024:10.2f} MiB")
+                results.append({
+                    'stage': stage_name,
+                    'size': size_name,
+                    'params': {k: v for k, v in size.items() if k != 'repeat'},
+                    **measurement
+                })
+
+    return {
+        'metadata': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': SEED
+        },
+        'results': results
+    }
+
+def compare_results(before: Dict[str, Any], after: Dict[str, Any],
+                    threshold: float) -> List[Dict[str, Any]]:
+    """Pair up results of two runs and flag changes beyond threshold"""
+    before_by_key = {(r['stage'], r['size']): r for r in before['results']}
+    rows = []
+    for result in after['results']:
+        previous = before_by_key.get((result['stage'], result['size']))
+        if previous is None:
+            continue
+        time_ratio = result['wall_seconds_median'] / max(previous['wall_seconds_median'], 1e-12)
+        memory_ratio = result['peak_memory_bytes'] / max(previous['peak_memory_bytes'], 1)
+        rows.append({
+            'stage': result['stage'],
+            'size': result['size'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        })
+    return rows
+
+def import_profile(module: str) -> Dict[str, float]:
+    """Cumulative import time in seconds of each module a fresh interpreter
+    imports for module, not counting those imported at interpreter startup"""
+    def profile(code: str) -> Dict[str, float]:
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                   capture_output=True, text=True, check=True)
+        times = {}
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            times[name.strip()] = int(cumulative) / 1e6
+        return times
+
+    startup = profile('pass')
+    return {name: seconds for name, seconds in profile(f'import {module}').items()
+            if name not in startup}
+
+def check_startup(repeat: int, budget_ms: float) -> Dict[str, Any]:
+    """Median import time of the CLI module, and the excluded modules it imports"""
+    profiles = [import_profile(STARTUP_MODULE) for _ in range(repeat)]
+    modules = set().union(*profiles)
+    return {
+        'import_ms': statistics.median(profile[STARTUP_MODULE] for profile in profiles) * 1000,
+        'budget_ms': budget_ms,
+        'excluded': sorted(
+            name for name in modules
+            if any(name == excluded or name.startswith(excluded + '.') for excluded in STARTUP_EXCLUDED)
+        ),
+        'slowest': sorted(profiles[-1].items(), key=lambda item: -item[1])[1:11]
+    }
+
+@click.group()
+def cli():
+    """Template generator benchmarks"""
+    pass
+
+@cli.command()
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write results as JSON')
+@click.option('--stage', 'stages', multiple=True, type=click.Choice(list(STAGES)),
+              help='Stage to run (default: all)')
+@click.option('--size', 'sizes', multiple=True, type=click.Choice(list(SIZES)),
+              help='Input size to run (default: all)')
+@click.option('--repeat', type=int, default=0, help='Timed runs per benchmark (default: per size)')
+def run(output: str, stages: List[str], sizes: List[str], repeat: int):
+    """Run the benchmarks"""
+    results = run_benchmarks(list(stages) or list(STAGES), list(sizes) or list(SIZES), repeat,
+                             echo=click.echo)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"Results written to {output}")
+
+@cli.command()
+@click.argument('before', type=click.Path(exists=True, dir_okay=False))
+@click.argument('after', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', type=float, default=0.10, show_default=True,
+              help='Relative slowdown or memory growth reported as a regression')
+def compare(before: str, after: str, threshold: float):
+    """Compare two result files and exit non-zero on regressions"""
+    with open(before) as f:
+        before_results = json.load(f)
+    with open(after) as f:
+        after_results = json.load(f)
+
+    rows = compare_results(before_results, after_results, threshold)
+    for row in rows:
+        flag = "REGRESSION" if row['regression'] else ""
+        click.echo(f"{row['stage']:22} {row['size']:8} time x{row['time_ratio']:6.2f} "
+                   f"memory x{row['memory_ratio']:6.2f} {flag}")
+    if any(row['regression'] for row in rows):
+        raise SystemExit(1)
+
+@cli.command()
+@click.option('--budget-ms', type=float, default=STARTUP_BUDGET_MS, show_default=True,
+              help='Maximum median import time of the CLI module')
+@click.option('--repeat', type=int, default=5, show_default=True,
+              help='Fresh interpreters to time')
+def startup(budget_ms: float, repeat: int):
+    """Check the CLI's import time and imports, and exit non-zero on regressions"""
+    result = check_startup(repeat, budget_ms)
+    click.echo(f"{STARTUP_MODULE} imports in {result['import_ms']:.2f} ms "
+               f"(budget {budget_ms:.2f} ms)")
+    for name, seconds in result['slowest']:
+        click.echo(f"  {seconds * 1000:8.2f} ms  {name}")
+    for name in result['excluded']:
+        click.echo(f"REGRESSION: {name} imported at startup")
+    if result['import_ms'] > budget_ms:
+        click.echo("REGRESSION: import time over budget")
+    if result['excluded'] or result['import_ms'] > budget_ms:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    cli()
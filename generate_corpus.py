@@ -0,0 +1,223 @@
+"""Generate a large synthetic template and pattern corpus for scale testing.
+
+The corpus is written in the formats read by TemplateRepository
+(``<templates_dir>/<genre>.json``) and PatternRepository
+(``<patterns_dir>/<genre>_patterns.json``). The same seed and sizes always
+produce the same corpus.
+
+    python generate_corpus.py --output corpus --genres 2000 --notes-per-clip 20000
+"""
+
+from dataclasses import dataclass, asdict
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import click
+import numpy as np
+
+COLORS = ["BLUE", "YELLOW", "RED", "GREEN", "PURPLE", "ORANGE"]
+TRACK_TYPES = ["MIDI", "AUDIO", "BOTH"]
+MARKER_TYPES = ["SECTION_START", "CUE_POINT", "ARRANGEMENT"]
+
+# Shared vocabulary, so that templates of different genres have tracks in common
+GROUP_NAMES = ["Drums", "Percussion", "Bass", "Harmony", "Lead", "FX", "Vocals", "Pads"]
+TRACK_NAMES = [
+    "Kick", "Snare", "Hats", "Congas", "Guiro", "Bass", "Sub", "Keys", "Strings",
+    "Guitar", "Synth", "Pluck", "Pad", "Riser", "Impact", "Vox", "Choir", "Arp"
+]
+AUTOMATION_PARAMETERS = ["Volume", "Pan", "Filter Cutoff", "Resonance", "Send A"]
+
+@dataclass
+class CorpusSpec:
+    """Sizes of a synthetic corpus"""
+    genres: int = 100
+    groups_per_template: int = 6
+    subgroup_depth: int = 2             # Levels of subgroups below each group
+    subgroups_per_group: int = 2
+    tracks_per_group: int = 4
+    max_layers: int = 8
+    markers_per_template: int = 16
+    pattern_genres: int = 10            # Genres that also get a pattern library
+    clips_per_track: int = 4
+    notes_per_clip: int = 1000
+    ccs_per_clip: int = 200
+    automations_per_clip: int = 2
+    points_per_automation: int = 100
+    seed: int = 0
+
+def _genre_name(index: int) -> str:
+    return f"genre{index:05d}"
+
+def template_dict(rng: np.random.Generator, genre: str, spec: CorpusSpec) -> Dict[str, Any]:
+    """Template dictionary as read by TemplateRepository"""
+    def make_group(name: str, color: str, depth: int) -> Dict[str, Any]:
+        group = {
+            "name": name,
+            "color": color,
+            "tracks": [
+                {
+                    "name": f"{TRACK_NAMES[int(rng.integers(len(TRACK_NAMES)))]} {t + 1}",
+                    "type": TRACK_TYPES[int(rng.integers(len(TRACK_TYPES)))],
+                    # Mostly the group's color, as in the hand-made templates
+                    "color": color if rng.random() < 0.8 else COLORS[int(rng.integers(len(COLORS)))],
+                    "layers": int(rng.integers(1, spec.max_layers + 1))
+                }
+                for t in range(spec.tracks_per_group)
+            ]
+        }
+        if depth < spec.subgroup_depth:
+            group["subgroups"] = [
+                make_group(f"{name} {s + 1}", color, depth + 1)
+                for s in range(spec.subgroups_per_group)
+            ]
+        return group
+
+    positions = np.cumsum(rng.choice([4, 8, 16], size=spec.markers_per_template)) - 4
+    return {
+        "genre": genre,
+        "default_tempo": int(rng.integers(70, 175)),
+        "default_duration_minutes": float(rng.choice([3.0, 3.5, 4.0, 5.0, 6.5])),
+        "groups": [
+            make_group(
+                GROUP_NAMES[g % len(GROUP_NAMES)] + ("" if g < len(GROUP_NAMES) else f" {g}"),
+                COLORS[g % len(COLORS)],
+                0
+            )
+            for g in range(spec.groups_per_template)
+        ],
+        "timeline_markers": [
+            {
+                "name": f"Section {m + 1}",
+                "position_bars": int(position),
+                "duration_bars": 4,
+                "description": f"Synthetic section {m + 1}",
+                "marker_type": MARKER_TYPES[m % len(MARKER_TYPES)]
+            }
+            for m, position in enumerate(positions)
+        ]
+    }
+
+def _template_tracks(group: Dict[str, Any]) -> List[str]:
+    names = [track["name"] for track in group["tracks"]]
+    for subgroup in group.get("subgroups", []):
+        names.extend(_template_tracks(subgroup))
+    return names
+
+def clip_dict(rng: np.random.Generator, name: str, slot: int, spec: CorpusSpec) -> Dict[str, Any]:
+    """Clip dictionary with notes, control changes and automation"""
+    length_bars = int(rng.choice([1, 2, 4, 8, 16]))
+    length_beats = length_bars * 4
+    steps = length_beats * 4  # Sixteenth grid
+
+    notes = spec.notes_per_clip
+    pitch = rng.integers(24, 108, size=notes).tolist()
+    velocity = rng.integers(30, 128, size=notes).tolist()
+    position = (np.sort(rng.integers(0, steps, size=notes)) * 0.25).tolist()
+    duration = rng.choice([0.25, 0.5, 1.0, 2.0], size=notes).tolist()
+    probability = np.round(rng.uniform(0.5, 1.0, size=notes), 3).tolist()
+
+    cc_position = np.sort(np.round(rng.uniform(0, length_beats, size=spec.ccs_per_clip), 4)).tolist()
+    cc_value = rng.integers(0, 128, size=spec.ccs_per_clip).tolist()
+    cc_controller = rng.choice([1, 7, 10, 11, 74], size=spec.ccs_per_clip).tolist()
+
+    return {
+        "name": name,
+        "length_bars": length_bars,
+        "slot_index": slot,
+        "scene_index": slot,
+        "color": "#{:06X}".format(int(rng.integers(0, 0xFFFFFF))),
+        "notes": [
+            {"pitch": p, "velocity": v, "position": pos, "duration": d, "probability": pr, "channel": 0}
+            for p, v, pos, d, pr in zip(pitch, velocity, position, duration, probability)
+        ],
+        "control_changes": [
+            {"controller": c, "value": v, "position": pos, "channel": 0}
+            for c, v, pos in zip(cc_controller, cc_value, cc_position)
+        ],
+        "automations": [
+            {
+                "parameter_name": AUTOMATION_PARAMETERS[a % len(AUTOMATION_PARAMETERS)],
+                "points": [
+                    {"value": value, "position": pos, "curve": 0.0}
+                    for value, pos in zip(
+                        np.round(rng.uniform(0, 1, size=spec.points_per_automation), 4).tolist(),
+                        np.linspace(0, length_beats, spec.points_per_automation, endpoint=False).tolist()
+                    )
+                ]
+            }
+            for a in range(spec.automations_per_clip)
+        ]
+    }
+
+def pattern_library_dict(rng: np.random.Generator, template: Dict[str, Any],
+                         spec: CorpusSpec) -> Dict[str, Any]:
+    """Pattern library dictionary as read by PatternRepository, one entry per track"""
+    track_names = []
+    for group in template["groups"]:
+        track_names.extend(_template_tracks(group))
+    return patterns_dict(rng, track_names, spec)
+
+def patterns_dict(rng: np.random.Generator, track_names: List[str], spec: CorpusSpec) -> Dict[str, Any]:
+    """Pattern library dictionary with clips for each of the named tracks"""
+    return {
+        "patterns": {
+            track_name: {
+                "clips": [
+                    clip_dict(rng, f"{track_name} {c + 1}", c, spec)
+                    for c in range(spec.clips_per_track)
+                ]
+            }
+            for track_name in dict.fromkeys(track_names)
+        }
+    }
+
+def generate_corpus(output_dir: str, spec: CorpusSpec) -> Dict[str, Path]:
+    """Write templates and pattern libraries for a spec"""
+    output_dir = Path(output_dir)
+    templates_dir = output_dir / "templates"
+    patterns_dir = output_dir / "patterns"
+    templates_dir.mkdir(parents=True, exist_ok=True)
+    patterns_dir.mkdir(parents=True, exist_ok=True)
+
+    for index in range(spec.genres):
+        # One generator per genre, so any genre can be regenerated on its own
+        rng = np.random.default_rng([spec.seed, index])
+        genre = _genre_name(index)
+        template = template_dict(rng, genre, spec)
+        with open(templates_dir / f"{genre}.json", 'w') as f:
+            json.dump(template, f)
+
+        if index < spec.pattern_genres:
+            with open(patterns_dir / f"{genre}_patterns.json", 'w') as f:
+                json.dump(pattern_library_dict(rng, template, spec), f)
+
+    with open(output_dir / "corpus.json", 'w') as f:
+        json.dump(asdict(spec), f, indent=2)
+
+    return {'templates': templates_dir, 'patterns': patterns_dir}
+
+@click.command()
+@click.option('--output', '-o', default='corpus', show_default=True, help='Output directory')
+@click.option('--genres', default=CorpusSpec.genres, show_default=True)
+@click.option('--groups', 'groups_per_template', default=CorpusSpec.groups_per_template, show_default=True)
+@click.option('--subgroup-depth', default=CorpusSpec.subgroup_depth, show_default=True)
+@click.option('--subgroups', 'subgroups_per_group', default=CorpusSpec.subgroups_per_group, show_default=True)
+@click.option('--tracks', 'tracks_per_group', default=CorpusSpec.tracks_per_group, show_default=True)
+@click.option('--max-layers', default=CorpusSpec.max_layers, show_default=True)
+@click.option('--markers', 'markers_per_template', default=CorpusSpec.markers_per_template, show_default=True)
+@click.option('--pattern-genres', default=CorpusSpec.pattern_genres, show_default=True)
+@click.option('--clips', 'clips_per_track', default=CorpusSpec.clips_per_track, show_default=True)
+@click.option('--notes-per-clip', default=CorpusSpec.notes_per_clip, show_default=True)
+@click.option('--ccs-per-clip', default=CorpusSpec.ccs_per_clip, show_default=True)
+@click.option('--automations', 'automations_per_clip', default=CorpusSpec.automations_per_clip, show_default=True)
+@click.option('--points', 'points_per_automation', default=CorpusSpec.points_per_automation, show_default=True)
+@click.option('--seed', default=CorpusSpec.seed, show_default=True)
+def main(output: str, **sizes):
+    """Generate a synthetic template and pattern corpus"""
+    paths = generate_corpus(output, CorpusSpec(**sizes))
+    print(f"Templates created in: {paths['templates'].resolve()}")
+    print(f"Patterns created in: {paths['patterns'].resolve()}")
+
+if __name__ == '__main__':
+    main()
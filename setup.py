@@ -5,8 +5,14 @@ setup(
     version="0.1.0",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    entry_points={
+        "console_scripts": [
+            "ableton-template-generator=ableton_template_generator.cli.main:cli",
+        ],
+    },
     install_requires=[
         "pydantic>=2.0.0",
+        "numpy>=1.22.0",
         "click>=8.0.0",
         "rich>=13.0.0",
         "pytest>=7.0.0",
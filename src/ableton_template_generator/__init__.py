@@ -0,0 +1,23 @@
+"""
+Ableton Template Generator
+A tool for generating Ableton Live templates based on musical genres.
+"""
+
+from importlib import import_module
+from typing import Any, List
+
+__version__ = "0.1.0"
+__author__ = "Luis Valencia"
+__email__ = "levm38@outlook.com"
+
+# Subpackages are imported on first access, so that importing one of them
+# (or running the CLI) does not import all the others
+_SUBPACKAGES = ('models', 'services', 'repositories', 'config', 'utils', 'export', 'cli')
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBPACKAGES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return import_module(f".{name}", __name__)
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_SUBPACKAGES))
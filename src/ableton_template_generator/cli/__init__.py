@@ -1,12 +1,17 @@
 """Command Line Interface module."""
 
-from .main import cli, generate_template
+from ..utils.lazy import lazy_exports
 
 __all__ = [
     'cli',
     'generate_template'
 ]
 
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'cli': '.main',
+    'generate_template': '.main'
+})
+
 # tests/__init__.py
 """Test suite for the template generator."""
 
@@ -0,0 +1,169 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from ..services.template_service import TemplateService
+from ..services.pattern_service import PatternService
+from ..repositories.template_repository import TemplateRepository
+from ..repositories.pattern_repository import PatternRepository
+from ..repositories.disk_cache import DiskCache
+from ..config.loader import get_setting
+from ..export.als_exporter import export_to_ableton
+
+@dataclass
+class BatchJob:
+    """One template to generate and export"""
+    genres: List[str]
+    output: str
+    with_patterns: bool = True
+    perform: bool = False      # Export performed notes (swing, groove, jitter, dropout)
+
+@dataclass
+class BatchResult:
+    """Outcome of a BatchJob"""
+    job: BatchJob
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+def load_manifest(manifest_path: str, output_dir: str = "output") -> Dict[str, Any]:
+    """Load a batch manifest.
+
+    The manifest is a YAML file with optional ``templates_dir`` and
+    ``patterns_dir`` keys (defaulting to the configured paths) and a
+    ``jobs`` list. Each job has ``genres`` and optionally ``output``
+    (defaults to ``<output_dir>/<genre+genre>.als``) and ``with_patterns``
+    and ``perform``. An invalid manifest raises ValueError.
+    """
+    with open(manifest_path, 'r') as f:
+        try:
+            manifest = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Error parsing manifest: {str(e)}")
+
+    if not isinstance(manifest, dict):
+        raise ValueError(f"Manifest must be a mapping: {manifest_path}")
+    if not manifest.get('jobs'):
+        raise ValueError(f"No jobs found in manifest: {manifest_path}")
+    if not isinstance(manifest['jobs'], list):
+        raise ValueError(f"Manifest jobs must be a list: {manifest_path}")
+
+    jobs = [parse_job(entry, output_dir) for entry in manifest['jobs']]
+
+    templates_dir = manifest.get('templates_dir') or get_setting('paths', 'templates', default="templates")
+    patterns_dir = manifest.get('patterns_dir') or get_setting('paths', 'patterns', default="patterns")
+    return {
+        'templates_dir': templates_dir,
+        'patterns_dir': patterns_dir,
+        'jobs': jobs
+    }
+
+def parse_job(entry: Dict[str, Any], output_dir: str = "output") -> BatchJob:
+    """Build a job from a manifest entry (see load_manifest)"""
+    if not isinstance(entry, dict):
+        raise ValueError(f"Job must be a mapping with genres: {entry!r}")
+    if 'genres' not in entry:
+        raise ValueError(f"Job has no genres: {entry!r}")
+    genres = entry['genres']
+    if isinstance(genres, str):
+        genres = [genre.strip() for genre in genres.split(',')]
+    if not isinstance(genres, list) or not genres or not all(isinstance(genre, str) for genre in genres):
+        raise ValueError(f"Job genres must be a list of genre names: {genres!r}")
+    output = entry.get('output') or str(Path(output_dir) / f"{'+'.join(genres)}.als")
+    flags = {'with_patterns': entry.get('with_patterns', True), 'perform': entry.get('perform', False)}
+    for name, value in flags.items():
+        # A string such as "no" would otherwise count as true
+        if not isinstance(value, bool):
+            raise ValueError(f"Job {name} must be true or false: {value!r}")
+    return BatchJob(genres=genres, output=output, **flags)
+
+def export_job(job: BatchJob, template_service: TemplateService,
+               pattern_service: PatternService,
+               fragment_cache: Optional[DiskCache] = None) -> Path:
+    """Generate and export one template"""
+    from .main import generate_template
+
+    template, patterns = generate_template(
+        template_service, pattern_service, job.genres, job.with_patterns
+    )
+    return export_to_ableton(template, patterns, job.output, fragment_cache=fragment_cache,
+                             perform=job.perform)
+
+# Rendered track XML is larger than merged templates
+FRAGMENT_CACHE_BYTES = 512 * 1024 * 1024
+
+# Services of the current worker process, shared by all jobs it runs
+_worker_services = None
+
+def _init_worker(templates_dir: str, patterns_dir: str,
+                 merge_cache_dir: Optional[str] = None,
+                 fragment_cache_dir: Optional[str] = None) -> None:
+    global _worker_services
+    merge_cache = DiskCache(merge_cache_dir) if merge_cache_dir else None
+    fragment_cache = DiskCache(fragment_cache_dir, max_bytes=FRAGMENT_CACHE_BYTES) if fragment_cache_dir else None
+    _worker_services = (
+        TemplateService(TemplateRepository(templates_dir), merge_cache),
+        PatternService(PatternRepository(patterns_dir)),
+        fragment_cache
+    )
+
+def _run_job(job: BatchJob) -> BatchResult:
+    """Generate and export one template, capturing any failure"""
+    start = time.perf_counter()
+    try:
+        export_job(job, *_worker_services)
+        return BatchResult(job=job, seconds=time.perf_counter() - start)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if not isinstance(e, ValueError):
+            error += "\n" + traceback.format_exc()
+        return BatchResult(job=job, seconds=time.perf_counter() - start, error=error)
+
+def run_batch(jobs: List[BatchJob], templates_dir: Optional[str] = None,
+              patterns_dir: Optional[str] = None, workers: int = 1,
+              merge_cache_dir: Optional[str] = None,
+              fragment_cache_dir: Optional[str] = None) -> List[BatchResult]:
+    """Run jobs, fanning out over a process pool when workers > 1.
+
+    Each worker builds the repositories once and reuses their caches for
+    every job it runs. Workers share the on-disk merge and track fragment
+    caches, if given. Results are returned in job order. A job whose worker
+    process dies is reported as failed; the other jobs are not affected.
+    """
+    initargs = (templates_dir, patterns_dir, merge_cache_dir, fragment_cache_dir)
+    if workers <= 1:
+        _init_worker(*initargs)
+        return [_run_job(job) for job in jobs]
+
+    results: List[Optional[BatchResult]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        futures = [executor.submit(_run_job, job) for job in jobs]
+        for index, future in enumerate(futures):
+            try:
+                results[index] = future.result()
+            except BrokenProcessPool:
+                pass
+
+    # A dying worker breaks the whole pool, failing jobs that never ran
+    # too: run each of those alone to tell which one took its worker down
+    for index, job in enumerate(jobs):
+        if results[index] is None:
+            results[index] = _run_isolated(job, initargs)
+    return results
+
+def _run_isolated(job: BatchJob, initargs: tuple) -> BatchResult:
+    """Run one job in a process of its own"""
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs) as executor:
+        try:
+            return executor.submit(_run_job, job).result()
+        except BrokenProcessPool as e:
+            return BatchResult(job=job, seconds=0.0, error=f"Worker process died: {e}")
@@ -1,19 +1,100 @@
+"""Command line interface.
+
+Only click is imported up front: rich, the services, the repositories and
+numpy are imported by the commands that use them, so that ``--help`` and
+quick commands start fast. Keep module-level imports light (see
+``python -m benchmarks.run_benchmarks startup``).
+"""
+
 import click
-from rich.console import Console
-from rich.table import Table
-from typing import List
+import os
+import signal
+import sys
+import time
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from ..repositories.disk_cache import DiskCache, default_cache_dir
+
+if TYPE_CHECKING:
+    from ..services.template_service import TemplateService
+    from ..services.pattern_service import PatternService
+    from ..models.template import Template
+    from ..export.clip_index import ClipIndex
+    from ..services.ai_pattern_generator import AIPatternGenerator
+
+class _LazyConsole:
+    """rich Console created on first use, so commands that print nothing skip importing rich"""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+console = _LazyConsole()
 
-from ..services.template_service import TemplateService
-from ..services.pattern_service import PatternService
-from ..repositories.template_repository import TemplateRepository
-from ..repositories.pattern_repository import PatternRepository
-from ..models.template import Template
-from ..models.track import Track
+MERGE_CACHE_DIR = default_cache_dir() / "merged_templates"
+FRAGMENT_CACHE_DIR = default_cache_dir() / "track_fragments"
+AI_PATTERN_CACHE_DIR = default_cache_dir() / "ai_patterns"
+AI_PATTERN_CACHE_BYTES = 256 * 1024 * 1024
+GROOVE_CACHE_DIR = default_cache_dir() / "grooves"
 
-console = Console()
+def _setting(*keys: str):
+    """Option default read from default_settings.yml when the option is needed"""
+    def default():
+        from ..config.loader import get_setting
+        return get_setting(*keys)
+    return default
 
-def display_template(template: Template):
+def generate_template(template_service: 'TemplateService',
+                      pattern_service: 'PatternService',
+                      genres: List[str],
+                      with_patterns: bool = True,
+                      ai_generator: Optional['AIPatternGenerator'] = None
+                      ) -> Tuple['Template', Optional['ClipIndex']]:
+    """Create a template for genres and collect the patterns of its tracks.
+
+    With an ai_generator, the AI patterns in its cache (see the prefetch
+    command) are added to the tracks named after their instrument. The model
+    is never called: patterns not prefetched are left out.
+    """
+    from ..export.clip_index import ClipIndex
+    from ..models.midi_pattern import SessionClip
+
+    template = template_service.create_template(genres)
+
+    if not with_patterns:
+        return template, None
+
+    ai_patterns = {}
+    if ai_generator is not None:
+        for genre in genres:
+            try:
+                cached = ai_generator.cached_patterns(genre)
+            except ValueError:
+                # No AI generation settings for this genre
+                continue
+            for instrument, patterns in cached.patterns.items():
+                ai_patterns.setdefault(instrument.lower(), []).extend(patterns)
+
+    clip_index = ClipIndex()
+    for group in template.groups:
+        for track in group.tracks:
+            clips = pattern_service.merge_track_patterns(genres, track.name)
+            for pattern in ai_patterns.get(track.name.lower(), []):
+                clips.append(SessionClip(name=pattern.name, pattern=pattern,
+                                         slot_index=len(clips), scene_index=len(clips)))
+            clip_index.add(group.name, track.name, clips)
+
+    return template, clip_index
+
+def display_template(template: 'Template'):
     """Display template information in a formatted table"""
+    from rich.table import Table
+
     # Create main template info table
     main_table = Table(title=f"Template: {template.genre}")
     main_table.add_column("Property", style="cyan")
@@ -67,10 +148,301 @@ def cli():
 @click.option('--output', '-o', help='Output directory for the template')
 @click.option('--with-patterns/--no-patterns', default=True, 
               help='Include MIDI patterns in the template')
-def create(genres: List[str], output: str, with_patterns: bool):
+@click.option('--merge-cache/--no-merge-cache', default=True,
+              help='Reuse merged templates cached on disk')
+@click.option('--ai-patterns', is_flag=True,
+              help='Add the AI patterns cached by prefetch (the model is never called)')
+def create(genres: List[str], output: str, with_patterns: bool, merge_cache: bool,
+           ai_patterns: bool):
     """Create a new template for specified genres"""
+    from ..services.template_service import TemplateService
+    from ..services.pattern_service import PatternService
+    from ..repositories.template_repository import TemplateRepository
+    from ..repositories.pattern_repository import PatternRepository
+
     try:
         # Initialize services
-        template_repo = TemplateRepository(output if output else "templates")
+        template_repo = TemplateRepository(output or None)
         pattern_repo = PatternRepository()
-        template_service = 
\ No newline at end of file
+        template_service = TemplateService(
+            template_repo,
+            DiskCache(MERGE_CACHE_DIR) if merge_cache else None
+        )
+        pattern_service = PatternService(pattern_repo)
+        ai_generator = None
+        if ai_patterns:
+            from ..services.ai_pattern_generator import AIPatternGenerator
+            ai_generator = AIPatternGenerator(
+                cache=DiskCache(AI_PATTERN_CACHE_DIR, AI_PATTERN_CACHE_BYTES)
+            )
+
+        template, patterns = generate_template(
+            template_service, pattern_service, list(genres), with_patterns, ai_generator
+        )
+        display_template(template)
+        if patterns is not None:
+            console.print(f"Patterns: {len(patterns)} clips")
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+
+@cli.command('create-batch')
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', '-w', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Number of worker processes')
+@click.option('--output-dir', default=_setting('paths', 'output'), show_default='output',
+              help='Directory for jobs without an explicit output')
+@click.option('--merge-cache/--no-merge-cache', default=True,
+              help='Reuse merged templates cached on disk')
+@click.option('--incremental', is_flag=True,
+              help='Reuse the XML of unchanged tracks cached on disk by earlier exports')
+def create_batch(manifest: str, workers: int, output_dir: str, merge_cache: bool,
+                 incremental: bool):
+    """Create and export templates for every genre combination in a manifest"""
+    from rich.table import Table
+    from .batch import load_manifest, run_batch
+
+    try:
+        batch = load_manifest(manifest, output_dir)
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+
+    jobs = batch['jobs']
+    console.print(f"Running {len(jobs)} jobs on {min(workers, len(jobs))} workers")
+    results = run_batch(
+        jobs,
+        templates_dir=batch['templates_dir'],
+        patterns_dir=batch['patterns_dir'],
+        workers=min(workers, len(jobs)),
+        merge_cache_dir=str(MERGE_CACHE_DIR) if merge_cache else None,
+        fragment_cache_dir=str(FRAGMENT_CACHE_DIR) if incremental else None
+    )
+
+    results_table = Table(title="Batch Results")
+    results_table.add_column("Genres", style="cyan")
+    results_table.add_column("Output", style="green")
+    results_table.add_column("Time", style="yellow")
+    results_table.add_column("Status", style="magenta")
+
+    for result in results:
+        results_table.add_row(
+            "+".join(result.job.genres),
+            result.job.output,
+            f"{result.seconds:.3f}s",
+            "ok" if result.succeeded else f"[red]{result.error.splitlines()[0]}[/red]"
+        )
+
+    console.print(results_table)
+
+    failures = [result for result in results if not result.succeeded]
+    total = sum(result.seconds for result in results)
+    console.print(f"{len(results) - len(failures)} succeeded, {len(failures)} failed, "
+                  f"{total:.3f}s total job time")
+    if failures:
+        raise SystemExit(1)
+
+@cli.command('convert-patterns')
+@click.argument('genres', nargs=-1)
+@click.option('--patterns-dir', default=_setting('paths', 'patterns'), show_default='patterns',
+              help='Directory of the pattern libraries')
+def convert_patterns(genres: List[str], patterns_dir: str):
+    """Convert JSON pattern libraries to the binary format (all genres if none given)"""
+    from ..repositories.pattern_repository import PatternRepository
+
+    pattern_repo = PatternRepository(patterns_dir)
+    for genre in genres or pattern_repo.get_genres():
+        try:
+            path = pattern_repo.convert_to_binary(genre)
+        except ValueError as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+            raise click.Abort()
+        console.print(f"{genre}: {path}")
+
+@cli.command('import-midi')
+@click.argument('source_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--patterns-dir', default=_setting('paths', 'patterns'), show_default='patterns',
+              help='Directory of the pattern libraries to write')
+@click.option('--workers', '-w', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Number of worker processes')
+@click.option('--full', is_flag=True, help='Re-import every file, not only changed ones')
+@click.option('--binary/--no-binary', default=True,
+              help='Also write the binary pattern libraries')
+def import_midi(source_dir: str, patterns_dir: str, workers: int, full: bool, binary: bool):
+    """Import MIDI files laid out as SOURCE_DIR/<genre>/<instrument>/*.mid"""
+    from ..services.midi_import_service import MidiImportService
+    from ..repositories.pattern_repository import PatternRepository
+
+    import_service = MidiImportService(PatternRepository(patterns_dir))
+    try:
+        result = import_service.import_directory(source_dir, workers, full, binary)
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+
+    for path, error in result.errors.items():
+        console.print(f"[red]{path}: {error}[/red]")
+    console.print(f"{result.decoded} decoded, {result.unchanged} unchanged, "
+                  f"{result.removed} removed, {len(result.errors)} failed")
+    console.print(f"Pattern libraries written: {', '.join(result.genres) or 'none'}")
+
+@cli.command('apply-groove')
+@click.argument('groove_genre')
+@click.argument('groove_instrument')
+@click.argument('target_genre')
+@click.option('--instrument', '-i', 'instruments', multiple=True,
+              help='Target instruments (default: all of the target genre)')
+@click.option('--clip', 'clip_index', type=int, default=0, show_default=True,
+              help='Clip of the groove instrument to take the groove from')
+@click.option('--resolution', type=float, default=0.25, show_default=True,
+              help='Groove grid step in beats')
+@click.option('--amount', type=float, default=1.0, show_default=True,
+              help='How far notes move towards the groove (0.0 to 1.0)')
+@click.option('--output-genre', help='Library to write (default: <target_genre>_grooved)')
+@click.option('--patterns-dir', default=_setting('paths', 'patterns'), show_default='patterns',
+              help='Directory of the pattern libraries')
+@click.option('--binary/--no-binary', default=True,
+              help='Also write the binary pattern library')
+def apply_groove(groove_genre: str, groove_instrument: str, target_genre: str,
+                 instruments: List[str], clip_index: int, resolution: float, amount: float,
+                 output_genre: Optional[str], patterns_dir: str, binary: bool):
+    """Apply the groove of GROOVE_GENRE's GROOVE_INSTRUMENT to TARGET_GENRE's patterns"""
+    from ..services.groove_service import GrooveService
+    from ..repositories.pattern_repository import PatternRepository
+
+    pattern_repo = PatternRepository(patterns_dir)
+    groove_service = GrooveService(pattern_repo, DiskCache(GROOVE_CACHE_DIR))
+    output_genre = output_genre or f"{target_genre}_grooved"
+    try:
+        groove = groove_service.get_groove(groove_genre, groove_instrument, clip_index, resolution)
+        grooved = groove_service.apply_to_library(groove, target_genre, list(instruments), amount)
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+
+    path = pattern_repo.save_library(output_genre, pattern_repo.serialize(grooved), binary)
+    clips = sum(len(instrument_clips) for instrument_clips in grooved.values())
+    console.print(f"Applied groove '{groove.name}' ({groove.steps} steps) to {clips} clips")
+    console.print(f"{output_genre}: {path}")
+
+@cli.command()
+@click.argument('genres', nargs=-1)
+@click.option('--config', 'config_path', type=click.Path(exists=True, dir_okay=False),
+              help='AI generation settings (default: the bundled ai_generation.yml)')
+@click.option('--concurrency', '-c', type=int, default=4, show_default=True,
+              help='Maximum number of requests in flight')
+@click.option('--retries', type=int, default=3, show_default=True,
+              help='Retries per request after a transient failure')
+@click.option('--ttl-days', type=float, default=30, show_default=True,
+              help='Days before a cached pattern is generated again')
+@click.option('--refresh', is_flag=True, help='Regenerate patterns even if cached')
+def prefetch(genres: List[str], config_path: Optional[str], concurrency: int, retries: int,
+             ttl_days: float, refresh: bool):
+    """Generate and cache AI patterns for every configured instrument (all genres if none given)"""
+    from rich.table import Table
+    from ..services.ai_pattern_generator import AIPatternGenerator
+    from ..config.ai_config import get_ai_config
+
+    try:
+        config = get_ai_config(config_path)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+    cache = DiskCache(AI_PATTERN_CACHE_DIR, AI_PATTERN_CACHE_BYTES, ttl_days * 24 * 3600)
+
+    results_table = Table(title="Prefetched Patterns")
+    results_table.add_column("Genre", style="cyan")
+    results_table.add_column("Instrument", style="green")
+    results_table.add_column("Patterns", style="yellow")
+    results_table.add_column("Status", style="magenta")
+
+    failed = 0
+    with AIPatternGenerator(config, max_concurrency=concurrency, max_retries=retries,
+                            cache=cache) as generator:
+        for genre in genres or config.genres:
+            try:
+                pattern_requests = generator.build_requests(genre)
+            except ValueError as e:
+                console.print(f"[red]Error: {str(e)}[/red]")
+                raise click.Abort()
+            result = generator.generate(genre, refresh=refresh)
+            for instrument in dict.fromkeys(request.instrument for request in pattern_requests):
+                errors = [
+                    error for key, error in result.errors.items()
+                    if key.rsplit('/', 1)[0] == instrument
+                ]
+                failed += len(errors)
+                results_table.add_row(
+                    genre,
+                    instrument,
+                    str(len(result.patterns.get(instrument, []))),
+                    "ok" if not errors else f"[red]{errors[0]}[/red]"
+                )
+            console.print(f"{genre}: {result.attempts} requests, {result.cached} cached")
+
+    console.print(results_table)
+    if failed:
+        console.print(f"[red]{failed} patterns failed[/red]")
+        raise SystemExit(1)
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', type=int, default=8766, show_default=True, help='Port to listen on')
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Listen on this unix socket instead of a TCP port')
+@click.option('--templates-dir', default=_setting('paths', 'templates'), show_default='templates',
+              help='Directory of the templates')
+@click.option('--patterns-dir', default=_setting('paths', 'patterns'), show_default='patterns',
+              help='Directory of the pattern libraries')
+@click.option('--output-dir', default=_setting('paths', 'output'), show_default='output',
+              help='Directory exports are written to; requests cannot write outside it')
+@click.option('--jobs', '-j', type=int, default=4, show_default=True,
+              help='Maximum number of requests generating at once')
+@click.option('--watch-interval', type=float, default=1.0, show_default=True,
+              help='Seconds between checks for changed files (0 to disable)')
+@click.option('--merge-cache/--no-merge-cache', default=True,
+              help='Reuse merged templates cached on disk')
+@click.option('--incremental', is_flag=True,
+              help='Reuse the XML of unchanged tracks cached on disk by earlier exports')
+@click.option('--verbose', '-v', is_flag=True, help='Log every request')
+def serve(host: str, port: int, socket_path: Optional[str], templates_dir: str, patterns_dir: str,
+          output_dir: str, jobs: int, watch_interval: float, merge_cache: bool, incremental: bool, verbose: bool):
+    """Serve template creation and export requests, keeping templates and patterns loaded"""
+    from .batch import FRAGMENT_CACHE_BYTES
+    from .server import Workspace, GenerationServer
+
+    try:
+        workspace = Workspace(
+            templates_dir, patterns_dir, output_dir,
+            merge_cache=DiskCache(MERGE_CACHE_DIR) if merge_cache else None,
+            fragment_cache=DiskCache(FRAGMENT_CACHE_DIR, max_bytes=FRAGMENT_CACHE_BYTES) if incremental else None,
+            max_jobs=jobs,
+            log=console.print
+        )
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise click.Abort()
+
+    start = time.perf_counter()
+    workspace.warm()
+    status = workspace.status()
+    console.print(f"Loaded {len(status['templates'])} templates and {len(status['patterns'])} "
+                  f"pattern libraries in {time.perf_counter() - start:.3f}s")
+
+    if socket_path:
+        from .server import UnixGenerationServer
+        server = UnixGenerationServer(workspace, socket_path, watch_interval, verbose)
+    else:
+        server = GenerationServer(workspace, host, port, watch_interval, verbose)
+    console.print(f"Serving on {server.address}, writing sets to {workspace.output_dir}")
+    # Stopped by a service manager: shut down as on Ctrl-C, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,414 @@
+"""Long-running generation server.
+
+Every CLI invocation builds its repositories and reads the templates and
+pattern libraries again. The server keeps them, and the configuration,
+loaded between requests, so a request only costs its merge and export:
+
+    python -m ableton_template_generator.cli.main serve --port 8766
+    python -m ableton_template_generator.cli.main serve --socket /tmp/atg.sock
+
+Requests and replies are JSON:
+
+    GET  /health    genres available, files reloaded, requests served
+    POST /create    {"genres": [...], "with_patterns": true}
+                    -> the template, as stored by TemplateRepository, and
+                       its number of clips
+    POST /export    {"genres": [...], "output": "set.als", "with_patterns": true,
+                     "perform": false}
+                    -> path written and seconds taken
+
+Export requests take the fields of a batch manifest job (see
+batch.parse_job). Sets are only written inside the server's output
+directory: ``output`` is relative to it (default ``<genre+genre>.als``),
+and paths resolving outside it are rejected. Genres must be plain names,
+read only from the template and pattern directories. Invalid requests get
+HTTP 400 with {"error": ...}.
+
+Requests are served concurrently, with at most ``max_jobs`` generating at
+once. A FileWatcher polls the template, pattern and config directories and
+reloads changed files in the background, so the request after an edit
+finds them loaded. Requests never see stale content either way: the
+repositories check each file's mtime and size on every access.
+"""
+
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..services.template_service import TemplateService
+from ..services.pattern_service import PatternService
+from ..repositories.template_repository import TemplateRepository
+from ..repositories.pattern_repository import PatternRepository
+from ..repositories.binary_patterns import SUFFIX as BINARY_SUFFIX
+from ..repositories.disk_cache import DiskCache
+from ..config.loader import CONFIG_DIR, get_setting, get_settings
+from .batch import parse_job, export_job
+from .main import generate_template
+
+DEFAULT_PORT = 8766
+# Largest request body accepted, requests being a few genre names
+MAX_REQUEST_BYTES = 1024 * 1024
+
+PATTERN_SUFFIXES = ("_patterns.json", f"_patterns{BINARY_SUFFIX}")
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+class FileWatcher:
+    """Polls directories and reports the files added, changed or removed.
+
+    Files are compared by mtime and size, like the repository caches do, so
+    a check costs one stat per file. Subdirectories are not watched.
+    """
+
+    def __init__(self, directories: Iterable[Path], callback: Callable[[Set[Path]], None],
+                 interval: float = 1.0):
+        self.directories = [Path(directory) for directory in directories]
+        self.callback = callback
+        self.interval = interval
+        self._snapshot = self.scan()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> Snapshot:
+        """Signature of every file in the watched directories"""
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    pass
+        return snapshot
+
+    def check(self) -> Set[Path]:
+        """Files changed since the last check, passed to the callback if any"""
+        snapshot = self.scan()
+        changed = {
+            path for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        if changed:
+            self.callback(changed)
+        return changed
+
+    def start(self) -> 'FileWatcher':
+        """Check on a background thread every interval"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop checking"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+class Workspace:
+    """Services and repositories kept loaded between requests"""
+
+    def __init__(self, templates_dir: Optional[str] = None, patterns_dir: Optional[str] = None,
+                 output_dir: Optional[str] = None,
+                 merge_cache: Optional[DiskCache] = None, fragment_cache: Optional[DiskCache] = None,
+                 max_jobs: int = 4, cache_size: int = 256, log: Callable[[str], None] = print):
+        if max_jobs < 1:
+            raise ValueError("max_jobs must be at least 1")
+        if output_dir is None:
+            output_dir = get_setting('paths', 'output', default="output")
+        # Exports are confined to this directory, whatever the client asks for
+        self.output_dir = Path(output_dir).resolve()
+        self.template_repository = TemplateRepository(templates_dir, cache_size)
+        self.pattern_repository = PatternRepository(patterns_dir, cache_size)
+        self.template_service = TemplateService(self.template_repository, merge_cache)
+        self.pattern_service = PatternService(self.pattern_repository)
+        self.fragment_cache = fragment_cache
+        self.log = log
+        self.reloads = 0
+        self.reload_errors = 0
+        self.requests = 0
+        self._jobs = threading.BoundedSemaphore(max_jobs)
+        self._counter_lock = threading.Lock()
+
+    @property
+    def watched_directories(self) -> List[Path]:
+        """Directories holding the files the workspace keeps loaded"""
+        return [self.template_repository.templates_dir, self.pattern_repository.patterns_dir, CONFIG_DIR]
+
+    def template_genres(self) -> List[str]:
+        """Genres that have a template file"""
+        return sorted(path.stem for path in self.template_repository.templates_dir.glob("*.json"))
+
+    def pattern_genres(self) -> List[str]:
+        """Genres that have a JSON or binary pattern library"""
+        if not self.pattern_repository.patterns_dir.is_dir():
+            return []
+        genres = set()
+        for path in self.pattern_repository.patterns_dir.iterdir():
+            genre = _pattern_genre(path)
+            if genre is not None:
+                genres.add(genre)
+        return sorted(genres)
+
+    def warm(self) -> None:
+        """Load the configuration and every template and pattern library"""
+        self.reload(
+            [self.template_repository.template_path(genre) for genre in self.template_genres()]
+            + [self.pattern_repository.json_path(genre) for genre in self.pattern_genres()]
+            + [CONFIG_DIR]
+        )
+
+    def reload(self, paths: Iterable[Path]) -> None:
+        """Load changed files again; files the workspace does not use are ignored"""
+        for path in sorted(set(paths)):
+            try:
+                if path.parent == self.template_repository.templates_dir and path.suffix == '.json':
+                    if path.exists():
+                        self.template_repository.load_template(path.stem)
+                elif path.parent == self.pattern_repository.patterns_dir and _pattern_genre(path):
+                    # The repository picks the JSON or binary file itself
+                    genre = _pattern_genre(path)
+                    if self.pattern_repository.pattern_path(genre).exists():
+                        self.pattern_repository.load_patterns(genre)
+                elif path == CONFIG_DIR or (path.parent == CONFIG_DIR and path.suffix == '.yml'):
+                    get_settings()
+                else:
+                    continue
+                with self._counter_lock:
+                    self.reloads += 1
+            except Exception as e:
+                # A file may be caught half written; the next change reloads it
+                with self._counter_lock:
+                    self.reload_errors += 1
+                self.log(f"Reloading {path} failed: {type(e).__name__}: {e}")
+
+    def create(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a create request"""
+        job = parse_job(request)
+        self.check_genres(job.genres)
+        with self._start_job():
+            template, patterns = generate_template(
+                self.template_service, self.pattern_service, job.genres, job.with_patterns
+            )
+        return {
+            'template': self.template_repository.serialize(template),
+            'clips': len(patterns) if patterns is not None else 0
+        }
+
+    def export(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle an export request"""
+        job = parse_job(request, output_dir=".")
+        self.check_genres(job.genres)
+        job = replace(job, output=str(self.output_path(job.output)))
+        start = time.perf_counter()
+        with self._start_job():
+            path = export_job(job, self.template_service, self.pattern_service, self.fragment_cache)
+        return {'output': str(path), 'seconds': time.perf_counter() - start}
+
+    def output_path(self, output: str) -> Path:
+        """Resolve a requested output path, which must stay inside output_dir"""
+        path = (self.output_dir / output).resolve()
+        try:
+            path.relative_to(self.output_dir)
+        except ValueError:
+            raise ValueError(f"Output must be inside the output directory: {output}")
+        if path == self.output_dir:
+            raise ValueError(f"Output must be a file in the output directory: {output}")
+        return path
+
+    def check_genres(self, genres: List[str]) -> None:
+        """Reject genre names that would read files outside the template and pattern directories"""
+        separators = {'/', os.sep, os.altsep} - {None}
+        for genre in genres:
+            if (not genre or genre in ('.', '..') or os.path.isabs(genre)
+                    or any(separator in genre for separator in separators)):
+                raise ValueError(f"Invalid genre name: {genre!r}")
+            paths = [
+                (self.template_repository.template_path(genre), self.template_repository.templates_dir),
+                (self.pattern_repository.json_path(genre), self.pattern_repository.patterns_dir),
+                (self.pattern_repository.binary_path(genre), self.pattern_repository.patterns_dir)
+            ]
+            for path, root in paths:
+                try:
+                    path.resolve().relative_to(root.resolve())
+                except ValueError:
+                    raise ValueError(f"Invalid genre name: {genre!r}")
+
+    def status(self) -> Dict[str, Any]:
+        """Summary of the workspace for the health endpoint"""
+        return {
+            'status': 'ok',
+            'templates': self.template_genres(),
+            'patterns': self.pattern_genres(),
+            'reloads': self.reloads,
+            'reload_errors': self.reload_errors,
+            'requests': self.requests
+        }
+
+    def _start_job(self) -> threading.BoundedSemaphore:
+        """Count a request; the semaphore returned bounds the requests generating at once"""
+        with self._counter_lock:
+            self.requests += 1
+        return self._jobs
+
+def _pattern_genre(path: Path) -> Optional[str]:
+    """Genre of a pattern library file, or None for other files"""
+    for suffix in PATTERN_SUFFIXES:
+        if path.name.endswith(suffix):
+            return path.name[:-len(suffix)]
+    return None
+
+class _GenerationHandler(BaseHTTPRequestHandler):
+    server: '_GenerationServerMixin'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, self.server.workspace.status())
+        else:
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        routes = {'/create': self.server.workspace.create, '/export': self.server.workspace.export}
+        handler = routes.get(self.path)
+        if handler is None:
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError(f"Request larger than {MAX_REQUEST_BYTES} bytes")
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            self._reply(200, handler(request))
+        except (ValueError, KeyError) as e:
+            message = f"Missing field: {e}" if isinstance(e, KeyError) else str(e)
+            self._reply(400, {'error': message})
+        except Exception as e:
+            self.server.log(traceback.format_exc())
+            self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            # The client went away; nothing left to tell it
+            pass
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else self.server.address
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class _GenerationServerMixin:
+    """Serving, file watching and shutdown shared by the TCP and unix socket servers"""
+
+    daemon_threads = True
+    workspace: Workspace
+    verbose: bool
+
+    def _setup(self, workspace: Workspace, watch_interval: float, verbose: bool) -> None:
+        self.workspace = workspace
+        self.verbose = verbose
+        self.watcher = (
+            FileWatcher(workspace.watched_directories, workspace.reload, watch_interval)
+            if watch_interval > 0 else None
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, message: str) -> None:
+        print(message, file=sys.stderr)
+
+    def run(self) -> None:
+        """Watch files and serve until interrupted or shut down"""
+        if self.watcher is not None:
+            self.watcher.start()
+        try:
+            self.serve_forever()
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+
+    def start(self) -> '_GenerationServerMixin':
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+class GenerationServer(_GenerationServerMixin, ThreadingHTTPServer):
+    """Generation server on a TCP port"""
+
+    def __init__(self, workspace: Workspace, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 watch_interval: float = 1.0, verbose: bool = False):
+        ThreadingHTTPServer.__init__(self, (host, port), _GenerationHandler)
+        self._setup(workspace, watch_interval, verbose)
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class UnixGenerationServer(_GenerationServerMixin, socketserver.ThreadingUnixStreamServer):
+        """Generation server on a unix socket, e.g. for curl --unix-socket"""
+
+        def __init__(self, workspace: Workspace, socket_path: str, watch_interval: float = 1.0,
+                     verbose: bool = False):
+            self.socket_path = Path(socket_path)
+            # A socket left behind by a server that did not shut down cleanly
+            if self.socket_path.is_socket():
+                self.socket_path.unlink()
+            socketserver.ThreadingUnixStreamServer.__init__(self, str(self.socket_path), _GenerationHandler)
+            self._setup(workspace, watch_interval, verbose)
+
+        @property
+        def address(self) -> str:
+            return f"unix:{self.socket_path}"
+
+        def server_close(self) -> None:
+            super().server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
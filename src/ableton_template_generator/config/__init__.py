@@ -1,15 +1,27 @@
-from .ai_config import (
-    AIConfig,
-    AIProvider,
-    AIModelConfig,
-    GenreSettings,
-    PatternGenerationSettings
-)
+from ..utils.lazy import lazy_exports
 
 __all__ = [
     'AIConfig',
     'AIProvider',
     'AIModelConfig',
     'GenreSettings',
-    'PatternGenerationSettings'
-]
\ No newline at end of file
+    'PatternGenerationSettings',
+    'get_ai_config',
+    'ConfigLoader',
+    'load_config',
+    'get_settings',
+    'get_setting'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'AIConfig': '.ai_config',
+    'AIProvider': '.ai_config',
+    'AIModelConfig': '.ai_config',
+    'GenreSettings': '.ai_config',
+    'PatternGenerationSettings': '.ai_config',
+    'get_ai_config': '.ai_config',
+    'ConfigLoader': '.loader',
+    'load_config': '.loader',
+    'get_settings': '.loader',
+    'get_setting': '.loader'
+})
@@ -1,8 +1,10 @@
+import copy
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 import yaml
 from dataclasses import dataclass
 from enum import Enum
+from .loader import CONFIG_DIR, load_config
 
 class AIProvider(Enum):
     ANTHROPIC = "anthropic"
@@ -37,25 +39,29 @@ class AIConfig:
         """Initialize AI configuration from YAML file"""
         if config_path is None:
             # Default to config directory in package
-            package_dir = Path(__file__).parent.parent
-            config_path = package_dir / "config" / "ai_generation.yml"
+            config_path = DEFAULT_AI_CONFIG_PATH
         
         self.config_path = Path(config_path)
         self.config = self._load_config()
         self.model_config = self._init_model_config()
         self.pattern_settings = self._init_pattern_settings()
-        self.genre_settings = self._init_genre_settings()
+        # Genres looked up before genre_settings is first used, see get_genre_settings
+        self._genre_settings: Dict[str, GenreSettings] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # genre_settings is a plain attribute, built on first access
+        if name == 'genre_settings':
+            genre_settings = {genre: self.get_genre_settings(genre) for genre in self.genres}
+            self.__dict__['genre_settings'] = genre_settings
+            return genre_settings
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
 
     def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from YAML file"""
+        """Load configuration from YAML file, parsed once per file content"""
         if not self.config_path.exists():
             raise FileNotFoundError(f"Config file not found: {self.config_path}")
-            
-        with open(self.config_path, 'r') as f:
-            try:
-                return yaml.safe_load(f)
-            except yaml.YAMLError as e:
-                raise ValueError(f"Error parsing config file: {str(e)}")
+        # The parsed document is shared by the whole process; keep a private copy
+        return copy.deepcopy(load_config(self.config_path))
 
     def _init_model_config(self) -> AIModelConfig:
         """Initialize AI model configuration"""
@@ -82,19 +88,19 @@ class AIConfig:
             max_bars=pattern_config.get('max_bars', 8)
         )
 
-    def _init_genre_settings(self) -> Dict[str, GenreSettings]:
-        """Initialize genre-specific settings"""
-        genre_configs = self.config['ai_generation']['genre_specific_settings']
-        genre_settings = {}
-        
-        for genre, settings in genre_configs.items():
-            genre_settings[genre] = GenreSettings(
-                preferred_complexity=settings.get('preferred_complexity', 3),
-                typical_bar_length=settings.get('typical_bar_length', 4),
-                instruments=settings.get('instruments', {})
-            )
-            
-        return genre_settings
+    def _init_genre_settings(self, genre: str) -> GenreSettings:
+        """Initialize the settings of one genre"""
+        settings = self.config['ai_generation']['genre_specific_settings'][genre] or {}
+        return GenreSettings(
+            preferred_complexity=settings.get('preferred_complexity', 3),
+            typical_bar_length=settings.get('typical_bar_length', 4),
+            instruments=settings.get('instruments', {})
+        )
+
+    @property
+    def genres(self) -> List[str]:
+        """Names of the configured genres, without building their settings"""
+        return list(self.config['ai_generation']['genre_specific_settings'])
 
     def _get_default_api_url(self, provider: str) -> str:
         """Get default API URL for provider"""
@@ -111,7 +117,13 @@ class AIConfig:
 
     def get_genre_settings(self, genre: str) -> Optional[GenreSettings]:
         """Get settings for specific genre"""
-        return self.genre_settings.get(genre.lower())
+        genre = genre.lower()
+        if 'genre_settings' in self.__dict__:
+            return self.genre_settings.get(genre)
+        settings = self._genre_settings.get(genre)
+        if settings is None and genre in self.config['ai_generation']['genre_specific_settings']:
+            settings = self._genre_settings[genre] = self._init_genre_settings(genre)
+        return settings
 
     def get_instrument_settings(self, genre: str, instrument: str) -> Dict[str, Any]:
         """Get instrument-specific settings for a genre"""
@@ -181,4 +193,14 @@ class AIConfig:
         }
 
         with open(self.config_path, 'w') as f:
-            yaml.dump(config_data, f, default_flow_style=False)
\ No newline at end of file
+            yaml.dump(config_data, f, default_flow_style=False)
+
+DEFAULT_AI_CONFIG_PATH = CONFIG_DIR / "ai_generation.yml"
+
+def get_ai_config(config_path: Optional[Union[str, Path]] = None) -> AIConfig:
+    """The AIConfig of a file (the bundled ai_generation.yml by default).
+
+    The file is parsed once per process, but every call returns its own
+    instance, so changes made by one caller are not seen by the others.
+    """
+    return AIConfig(config_path)
@@ -0,0 +1,85 @@
+"""Cached loading of the YAML configuration files.
+
+Every command, service and worker process used to parse the same files
+again. Files are now parsed once per process, with the C loader when PyYAML
+has one, and kept while their mtime and size are unchanged.
+
+Parsed documents are shared: callers must not modify them.
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import yaml
+
+# libyaml's loader is several times faster than the pure Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+CONFIG_DIR = Path(__file__).parent
+DEFAULT_SETTINGS_PATH = CONFIG_DIR / "default_settings.yml"
+
+def parse_yaml(data: bytes) -> Any:
+    """Parse a YAML document, raising ValueError if it is invalid"""
+    try:
+        return yaml.load(data, Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Error parsing config file: {str(e)}")
+
+class ConfigLoader:
+    """Loads YAML files through an in-memory cache.
+
+    An entry is reused while the file's mtime and size are unchanged; a
+    changed file is parsed again.
+    """
+
+    def __init__(self):
+        self.parses = 0      # Files parsed from YAML
+        self._entries: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: Union[str, Path]) -> Any:
+        """Parsed content of a YAML file"""
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Config file not found: {path}")
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+            value = parse_yaml(path.read_bytes())
+            self.parses += 1
+            self._entries[path] = (signature, value)
+            return value
+
+    def clear(self) -> None:
+        """Forget all files loaded in this process"""
+        with self._lock:
+            self._entries.clear()
+
+_loader = ConfigLoader()
+
+def get_loader() -> ConfigLoader:
+    """The process-wide ConfigLoader"""
+    return _loader
+
+def load_config(path: Union[str, Path]) -> Any:
+    """Parsed content of a YAML file, through the process-wide cache"""
+    return get_loader().load(path)
+
+def get_settings() -> Dict[str, Any]:
+    """The application's default settings (default_settings.yml)"""
+    return load_config(DEFAULT_SETTINGS_PATH)
+
+def get_setting(*keys: str, default: Any = None) -> Any:
+    """One value of the default settings, e.g. get_setting('paths', 'templates')"""
+    value: Any = get_settings()
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+    return value
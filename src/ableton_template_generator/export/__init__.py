@@ -0,0 +1,27 @@
+"""Export of templates to Ableton Live sets."""
+
+from ..utils.lazy import lazy_exports
+
+__all__ = [
+    'AlsExporter',
+    'export_to_ableton',
+    'convert_color_to_live_index',
+    'XmlStreamWriter',
+    'ClipIndex',
+    'IdAllocator',
+    'render_performance',
+    'render_performances',
+    'perform_clips'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'AlsExporter': '.als_exporter',
+    'export_to_ableton': '.als_exporter',
+    'convert_color_to_live_index': '.als_exporter',
+    'XmlStreamWriter': '.xml_writer',
+    'ClipIndex': '.clip_index',
+    'IdAllocator': '.ids',
+    'render_performance': '.performance',
+    'render_performances': '.performance',
+    'perform_clips': '.performance'
+})
@@ -0,0 +1,344 @@
+import gzip
+import hashlib
+import io
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from ..models.template import Template
+from ..models.group import Group
+from ..models.track import Track, TrackType, ColorCode
+from ..models.midi_pattern import SessionClip
+from ..repositories.disk_cache import DiskCache
+from .xml_writer import XmlStreamWriter
+from .clip_index import ClipIndex
+from .ids import IdAllocator
+from .performance import perform_clips
+
+# Clips for export: an index by track, or a flat list named "<group> - <track>..."
+Clips = Optional[Union[ClipIndex, List[SessionClip]]]
+
+# Attributes of the root element, matching Ableton Live 11
+ABLETON_ROOT_ATTRIBUTES = {
+    'MajorVersion': '5',
+    'MinorVersion': '10.0_377',
+    'SchemaChangeCount': '3',
+    'Creator': 'Ableton Live 11.0.12',
+    'Revision': '570160e452e6e8ec882f7b3e365122a4f3af9abd'
+}
+
+# Ableton Live color indices for our color codes
+LIVE_COLOR_INDEX = {
+    ColorCode.BLUE: 5,    # Blue
+    ColorCode.YELLOW: 1,  # Yellow
+    ColorCode.RED: 3,     # Red
+    ColorCode.GREEN: 2,   # Green
+    ColorCode.PURPLE: 7,  # Purple
+    ColorCode.ORANGE: 4   # Orange
+}
+
+# Bump when the rendering of tracks changes, to retire cached fragments
+FRAGMENT_FORMAT_VERSION = 2
+
+# Track ID cached fragments are rendered with, replaced by the real ID when
+# they are joined. Allocated IDs start at 1, so it never clashes with one
+PLACEHOLDER_TRACK_ID = 0
+
+# Depth of track elements: Ableton > LiveSet > Tracks > GroupTrack > Tracks
+TRACK_DEPTH = 5
+
+def convert_color_to_live_index(color: ColorCode) -> int:
+    """Convert our color codes to Ableton Live color indices"""
+    return LIVE_COLOR_INDEX.get(color, 0)
+
+class AlsExporter:
+    """Stream a Template and its clips to an Ableton Live set (.als).
+
+    The document is never built in memory: XML events are written through a
+    bounded buffer directly into the gzip stream while walking the template.
+
+    Output is deterministic: element IDs come from an IdAllocator and the
+    gzip header carries no timestamp or file name, so the same input always
+    exports to the same bytes.
+
+    With a ``fragment_cache``, export is incremental: the XML of each track
+    is cached under a hash of everything it is rendered from, and only
+    tracks whose hash is not cached are rendered again. Fragments are cached
+    without their track ID, which depends on the track's place in the set,
+    so adding or removing a track does not invalidate the tracks after it.
+    The output is the same as without the cache.
+
+    With ``workers`` > 1, tracks are rendered in a process pool while the
+    document is written, and joined in document order. The output is the
+    same as when rendering serially.
+
+    With ``perform``, clips are exported with their performed notes (see
+    performance.render_performances) instead of the notes as stored.
+    """
+
+    def __init__(self, pretty: bool = False, write_debug_xml: bool = False,
+                 compresslevel: int = 6, chunk_size: int = 64 * 1024,
+                 fragment_cache: Optional[DiskCache] = None, workers: int = 1,
+                 perform: bool = False, performance_seed: int = 0):
+        self.pretty = pretty
+        self.write_debug_xml = write_debug_xml
+        self.compresslevel = compresslevel
+        self.chunk_size = chunk_size
+        self.fragment_cache = fragment_cache
+        self.workers = workers
+        self.perform = perform
+        self.performance_seed = performance_seed
+        # Track fragments rendered and reused from the fragment cache by the last export
+        self.fragments_rendered = 0
+        self.fragments_reused = 0
+
+    def export(self, template: Template,
+               patterns: Clips = None,
+               output_path: Union[str, Path] = "template.als") -> Path:
+        """Export template to Ableton Live format (.als)"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with ExitStack() as stack:
+            als_file = stack.enter_context(open(output_path, 'wb'))
+            sinks = [stack.enter_context(gzip.GzipFile(
+                filename='', mode='wb', fileobj=als_file,
+                compresslevel=self.compresslevel, mtime=0
+            ))]
+            if self.write_debug_xml:
+                # Uncompressed copy of the same stream for debugging
+                sinks.append(stack.enter_context(open(output_path.with_suffix('.xml'), 'wb')))
+
+            writer = XmlStreamWriter(sinks, pretty=self.pretty, chunk_size=self.chunk_size)
+            self.write_document(writer, template, patterns)
+            writer.close()
+
+        return output_path
+
+    def write_document(self, writer: XmlStreamWriter, template: Template,
+                       patterns: Clips = None) -> None:
+        """Write the complete Ableton document to the writer"""
+        clip_index = self.index_clips(template, patterns)
+        if self.perform:
+            clip_index = perform_clips(clip_index, self.performance_seed)
+        ids = IdAllocator()
+        self.fragments_rendered = self.fragments_reused = 0
+
+        with ExitStack() as stack:
+            fragments = None
+            if self.workers > 1:
+                executor = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_render_worker,
+                    initargs=(self.pretty, self.chunk_size)
+                ))
+                fragments = self._render_parallel(executor, template, clip_index, ids)
+            self._write_document(writer, template, clip_index, ids, fragments)
+
+        if self.fragment_cache is not None and self.fragments_rendered:
+            self.fragment_cache.evict()
+
+    def _write_document(self, writer: XmlStreamWriter, template: Template,
+                        clip_index: ClipIndex, ids: IdAllocator,
+                        fragments: Optional[Iterator[bytes]]) -> None:
+        writer.declaration()
+        writer.start('Ableton', ABLETON_ROOT_ATTRIBUTES)
+        writer.start('LiveSet')
+
+        writer.start('Tracks')
+        for group_index, group in enumerate(template.groups):
+            self._write_group(writer, group, clip_index, ids, ('group', group_index), fragments)
+        writer.element('MasterTrack', {'Id': str(ids.integer_id('master')), 'Name': 'Master'})
+        writer.end()  # Tracks
+
+        # Tempo and other global settings
+        writer.element('MasterTrack', {'Value': str(template.default_tempo)})
+
+        if template.timeline_markers:
+            writer.start('Locators')
+            for marker_index, marker in enumerate(template.timeline_markers):
+                writer.element('Locator', {
+                    'Id': str(ids.integer_id('locator', marker_index)),
+                    'Name': marker.name,
+                    'Time': str(marker.position_bars * 4),  # Convert bars to beats
+                    'Duration': str(marker.duration_bars * 4),
+                    'Label': marker.description
+                })
+            writer.end()  # Locators
+
+        writer.end()  # LiveSet
+        writer.end()  # Ableton
+
+    @staticmethod
+    def index_clips(template: Template, patterns: Clips) -> ClipIndex:
+        """Get the clips of each track, indexing flat clip lists by name"""
+        if isinstance(patterns, ClipIndex):
+            return patterns
+        return ClipIndex.from_clip_names(template, patterns or [])
+
+    def _write_group(self, writer: XmlStreamWriter, group: Group,
+                     clip_index: ClipIndex, ids: IdAllocator, path: tuple,
+                     fragments: Optional[Iterator[bytes]] = None) -> None:
+        writer.start('GroupTrack', {'Id': str(ids.integer_id(*path)), 'Name': group.name})
+        writer.element('ColorIndex', text=str(convert_color_to_live_index(group.color)))
+        writer.start('Tracks')
+        for track_index, track in enumerate(group.tracks):
+            track_id = ids.integer_id(*path, 'track', track_index)
+            clips = clip_index.get(group.name, track.name)
+            if fragments is not None:
+                writer.raw(next(fragments))
+            elif self.fragment_cache is None:
+                self._write_track(writer, track, track_id, clips)
+            else:
+                writer.raw(self._cached_track(writer.depth, track, track_id, clips))
+        writer.end()  # Tracks
+        writer.end()  # GroupTrack
+
+    def render_track(self, depth: int, track: Track, track_id: int,
+                     clips: List[SessionClip]) -> bytes:
+        """Render the XML of one track, to be inserted at depth"""
+        buffer = io.BytesIO()
+        writer = XmlStreamWriter([buffer], pretty=self.pretty, chunk_size=self.chunk_size,
+                                 fragment_depth=depth)
+        self._write_track(writer, track, track_id, clips)
+        writer.close()
+        return buffer.getvalue()
+
+    def _render_parallel(self, executor: ProcessPoolExecutor, template: Template,
+                         clip_index: ClipIndex, ids: IdAllocator) -> Iterator[bytes]:
+        """Render tracks in the pool, yielding their fragments in document order.
+
+        Runs at most a few tracks per worker ahead of the writer, so memory
+        stays bounded. IDs are allocated here in the same order as the
+        serial walk allocates them.
+        """
+        pending = deque()
+        for group_index, group in enumerate(template.groups):
+            ids.integer_id('group', group_index)
+            for track_index, track in enumerate(group.tracks):
+                track_id = ids.integer_id('group', group_index, 'track', track_index)
+                clips = clip_index.get(group.name, track.name)
+                key = fragment = None
+                if self.fragment_cache is not None:
+                    key = self.track_fragment_key(TRACK_DEPTH, track, clips)
+                    fragment = self.fragment_cache.get_bytes(key)
+                if fragment is not None:
+                    self.fragments_reused += 1
+                    pending.append((key, track_id, None, fragment))
+                else:
+                    render_id = track_id if key is None else PLACEHOLDER_TRACK_ID
+                    future = executor.submit(_render_track, (TRACK_DEPTH, track, render_id, clips))
+                    pending.append((key, track_id, future, None))
+                while len(pending) > self.workers * 4:
+                    yield self._collect_fragment(*pending.popleft())
+        while pending:
+            yield self._collect_fragment(*pending.popleft())
+
+    def _collect_fragment(self, key: Optional[str], track_id: int, future,
+                          fragment: Optional[bytes]) -> bytes:
+        if future is not None:
+            fragment = future.result()
+            if key is None:
+                return fragment
+            self.fragment_cache.put_bytes(key, fragment, evict=False)
+            self.fragments_rendered += 1
+        return _with_track_id(fragment, track_id)
+
+    def _cached_track(self, depth: int, track: Track, track_id: int,
+                      clips: List[SessionClip]) -> bytes:
+        key = self.track_fragment_key(depth, track, clips)
+        fragment = self.fragment_cache.get_bytes(key)
+        if fragment is None:
+            fragment = self.render_track(depth, track, PLACEHOLDER_TRACK_ID, clips)
+            self.fragment_cache.put_bytes(key, fragment, evict=False)
+            self.fragments_rendered += 1
+        else:
+            self.fragments_reused += 1
+        return _with_track_id(fragment, track_id)
+
+    def track_fragment_key(self, depth: int, track: Track, clips: List[SessionClip]) -> str:
+        """Hash of everything the XML of a track is rendered from, but its ID"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((
+            FRAGMENT_FORMAT_VERSION, self.pretty, depth,
+            track.name, track.type.value, track.color.value, len(clips)
+        )).encode('utf-8'))
+        for clip in clips:
+            digest.update(repr((clip.name, clip.pattern.length_bars, len(clip.pattern.notes))).encode('utf-8'))
+            notes = clip.pattern.notes
+            for column in (notes.position, notes.duration, notes.velocity, notes.pitch):
+                digest.update(np.ascontiguousarray(column).data)
+        return digest.hexdigest()
+
+    def _write_track(self, writer: XmlStreamWriter, track: Track, track_id: int,
+                     clips: List[SessionClip]) -> None:
+        tag = 'MidiTrack' if track.type == TrackType.MIDI else 'AudioTrack'
+        writer.start(tag, {'Id': str(track_id), 'Name': track.name})
+        writer.element('ColorIndex', text=str(convert_color_to_live_index(track.color)))
+        if clips:
+            writer.start('DeviceChain')
+            self._write_clip_slots(writer, clips)
+            writer.end()  # DeviceChain
+        else:
+            writer.element('DeviceChain')
+        writer.end()
+
+    def _write_clip_slots(self, writer: XmlStreamWriter, clips: List[SessionClip]) -> None:
+        writer.start('ClipSlots')
+        # Clip slots are numbered within their track, as in Live sets
+        for slot_id, clip in enumerate(clips):
+            writer.start('ClipSlot', {
+                'Id': str(slot_id),
+                'Time': str(clip.pattern.length_bars * 4)
+            })
+            writer.start('MidiClip', {'Name': clip.name})
+            writer.start('Notes')
+            notes = clip.pattern.notes
+            # Read the note columns once instead of building MidiNote objects
+            for position, duration, velocity, pitch in zip(
+                    notes.position.tolist(), notes.duration.tolist(),
+                    notes.velocity.tolist(), notes.pitch.tolist()):
+                writer.element('Note', {
+                    'Time': str(position),
+                    'Duration': str(duration),
+                    'Velocity': str(velocity),
+                    'Pitch': str(pitch)
+                })
+            writer.end()  # Notes
+            writer.end()  # MidiClip
+            writer.end()  # ClipSlot
+        writer.end()  # ClipSlots
+
+def _with_track_id(fragment: bytes, track_id: int) -> bytes:
+    """Give a fragment rendered with PLACEHOLDER_TRACK_ID its track's ID"""
+    # The track element opens the fragment with Id as its first attribute;
+    # a quote inside an attribute value is escaped, so this cannot match there
+    placeholder = f' Id="{PLACEHOLDER_TRACK_ID}"'.encode('utf-8')
+    return fragment.replace(placeholder, f' Id="{track_id}"'.encode('utf-8'), 1)
+
+# Exporter of the current render worker process
+_worker_exporter = None
+
+def _init_render_worker(pretty: bool, chunk_size: int) -> None:
+    global _worker_exporter
+    _worker_exporter = AlsExporter(pretty=pretty, chunk_size=chunk_size)
+
+def _render_track(task: tuple) -> bytes:
+    return _worker_exporter.render_track(*task)
+
+def export_to_ableton(template: Template,
+                      patterns: Clips = None,
+                      output_path: Union[str, Path] = "template.als",
+                      pretty: bool = False,
+                      write_debug_xml: bool = False,
+                      fragment_cache: Optional[DiskCache] = None,
+                      workers: int = 1,
+                      perform: bool = False) -> Path:
+    """Export template to Ableton Live format (.als)"""
+    exporter = AlsExporter(pretty=pretty, write_debug_xml=write_debug_xml,
+                           fragment_cache=fragment_cache, workers=workers, perform=perform)
+    return exporter.export(template, patterns, output_path)
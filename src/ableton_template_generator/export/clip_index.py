@@ -0,0 +1,65 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.template import Template
+from ..models.midi_pattern import SessionClip
+
+# (group name, track name)
+ClipKey = Tuple[str, str]
+
+class ClipIndex:
+    """Clips of a template grouped by the track they belong to.
+
+    Built once before export, so that each track looks up its clips in
+    constant time instead of scanning every clip.
+    """
+
+    def __init__(self, clips: Optional[Dict[ClipKey, List[SessionClip]]] = None):
+        self._clips: Dict[ClipKey, List[SessionClip]] = {
+            key: list(track_clips) for key, track_clips in (clips or {}).items()
+        }
+
+    def add(self, group_name: str, track_name: str, clips: Iterable[SessionClip]) -> None:
+        """Append clips to a track"""
+        self._clips.setdefault((group_name, track_name), []).extend(clips)
+
+    def get(self, group_name: str, track_name: str) -> List[SessionClip]:
+        """Get the clips of a track"""
+        return self._clips.get((group_name, track_name), [])
+
+    def keys(self) -> Iterable[ClipKey]:
+        """Get the tracks that have clips"""
+        return self._clips.keys()
+
+    def __len__(self) -> int:
+        return sum(len(track_clips) for track_clips in self._clips.values())
+
+    def __iter__(self) -> Iterator[SessionClip]:
+        for track_clips in self._clips.values():
+            yield from track_clips
+
+    @classmethod
+    def from_clip_names(cls, template: Template, clips: Iterable[SessionClip]) -> 'ClipIndex':
+        """Index clips named "<group> - <track>..." under the matching tracks.
+
+        Supports flat clip lists named the way the notebook exporter used
+        to match them. A clip goes to every track whose "<group> - <track>"
+        prefix starts its name. Each clip is checked against one dictionary
+        lookup per distinct prefix length, so indexing stays linear in the
+        number of clips.
+        """
+        prefixes: Dict[str, List[ClipKey]] = {}
+        for group in template.groups:
+            for track in group.tracks:
+                keys = prefixes.setdefault(f"{group.name} - {track.name}", [])
+                if (group.name, track.name) not in keys:
+                    keys.append((group.name, track.name))
+        lengths = sorted({len(prefix) for prefix in prefixes})
+
+        index = cls()
+        for clip in clips:
+            for length in lengths:
+                if length > len(clip.name):
+                    break
+                for group_name, track_name in prefixes.get(clip.name[:length], ()):
+                    index.add(group_name, track_name, [clip])
+        return index
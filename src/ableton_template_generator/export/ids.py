@@ -0,0 +1,27 @@
+from typing import Dict, Hashable, Tuple
+
+# Structural path of an element, e.g. ('group', 2, 'track', 5)
+IdPath = Tuple[Hashable, ...]
+
+class IdAllocator:
+    """Deterministic IDs for exported elements.
+
+    Integer IDs, as Ableton stores in Id attributes, are handed out in
+    order of the first request for each structural path, starting at
+    ``first_id``. The same template walked in the same order therefore
+    always gets the same IDs, with no random numbers drawn per element.
+    """
+
+    def __init__(self, first_id: int = 1):
+        self.first_id = first_id
+        self._integer_ids: Dict[IdPath, int] = {}
+
+    def integer_id(self, *path: Hashable) -> int:
+        """Get the integer ID of a path, allocating the next one if new"""
+        integer_id = self._integer_ids.get(path)
+        if integer_id is None:
+            integer_id = self._integer_ids[path] = self.first_id + len(self._integer_ids)
+        return integer_id
+
+    def __len__(self) -> int:
+        return len(self._integer_ids)
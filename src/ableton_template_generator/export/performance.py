@@ -0,0 +1,176 @@
+"""Render stage turning patterns into the notes they perform.
+
+A MidiPattern stores how it should be played (swing, groove, velocity and
+timing variation, per-note probability) next to its notes. Rendering applies
+all of them as array operations, in this order:
+
+    swing       off-beat sixteenths are delayed, up to a triplet feel
+    groove      timing offsets and velocity scales of the groove's step
+                tables (DEFAULT_GROOVE unless given), scaled by groove_amount
+    jitter      uniform random timing (± timing_variation beats) and
+                velocity (± velocity_variation * MAX_VELOCITY_JITTER) changes
+    dropout     each note plays with its probability
+
+Random values come from a counter-based generator: each is a hash of the
+pattern's seed, the note's index and the kind of change. A pattern therefore
+renders to the same notes alone or in a batch, whatever else the batch holds.
+"""
+
+import hashlib
+from dataclasses import replace
+from typing import List, Sequence
+
+import numpy as np
+
+from ..models.midi_pattern import MidiPattern, NoteArray, NOTE_COLUMNS
+from ..models.groove import Groove
+from .clip_index import ClipIndex
+
+SWING_GRID = 0.25               # Swing delays the off-beat notes of this grid, in beats
+MAX_VELOCITY_JITTER = 32        # Velocity change at velocity_variation 1.0
+GRID_TOLERANCE = 0.01           # How far from a grid line a note still counts as on it
+
+# Groove applied by groove_amount: per sixteenth of a beat, a timing offset
+# in beats added to the note and a velocity scale
+DEFAULT_GROOVE = Groove(
+    resolution=0.25,
+    timing=[0.0, 0.02, -0.01, 0.03],
+    velocity=[1.1, 0.85, 1.0, 0.9],
+    name="default"
+)
+
+# Random streams, one per kind of change
+_TIMING_STREAM = 0
+_VELOCITY_STREAM = 1
+_DROPOUT_STREAM = 2
+_STREAMS = 3
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+def _random(seeds: np.ndarray, counters: np.ndarray) -> np.ndarray:
+    """Uniform floats in [0, 1), one per (seed, counter) pair (SplitMix64)"""
+    with np.errstate(over='ignore'):
+        z = seeds + (counters.astype(np.uint64) + np.uint64(1)) * _GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)) * (1.0 / (1 << 53))
+
+def pattern_seed(pattern: MidiPattern, seed: int = 0) -> int:
+    """Seed of a pattern's random changes, from its name and a global seed"""
+    key = f"{seed}\x1f{pattern.name}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+def render_performance(pattern: MidiPattern, seed: int = 0,
+                       groove: Groove = DEFAULT_GROOVE) -> NoteArray:
+    """Get the notes a pattern performs"""
+    return render_performances([pattern], seed, groove)[0]
+
+def render_performances(patterns: Sequence[MidiPattern], seed: int = 0,
+                        groove: Groove = DEFAULT_GROOVE) -> List[NoteArray]:
+    """Get the notes each pattern performs, rendering all of them in one pass.
+
+    The notes of all patterns are concatenated into one set of columns, with
+    each pattern's settings repeated per note, so every step is a single
+    array operation however many patterns there are. Performed notes have
+    probability 1.
+    """
+    patterns = list(patterns)
+    if not patterns:
+        return []
+    counts = np.array([len(pattern.notes) for pattern in patterns], dtype=np.intp)
+    # Joined as plain columns: a NoteArray would re-sort them by position
+    pitch, velocity, position, duration, probability, channel = (
+        np.concatenate([pattern.notes.column(name) for pattern in patterns])
+        for name in NOTE_COLUMNS
+    )
+    segment = np.repeat(np.arange(len(patterns)), counts)
+    starts = np.cumsum(counts) - counts
+    # Index of each note within its pattern, the counter of its random values
+    index = np.arange(len(pitch)) - np.repeat(starts, counts)
+
+    def per_note(values: List[float]) -> np.ndarray:
+        return np.repeat(np.asarray(values, dtype=np.float64), counts)
+
+    seeds = np.repeat(np.array([pattern_seed(pattern, seed) for pattern in patterns], dtype=np.uint64), counts)
+    original_position = position
+    velocity = velocity.astype(np.float64)
+
+    # Swing: off-beat grid notes move towards the next triplet
+    steps = position / SWING_GRID
+    nearest = np.rint(steps)
+    on_grid = np.abs(steps - nearest) < GRID_TOLERANCE / SWING_GRID
+    off_beat = on_grid & (nearest.astype(np.int64) % 2 == 1)
+    swing = per_note([pattern.swing_amount for pattern in patterns])
+    position = position + np.where(off_beat, swing * (SWING_GRID / 3), 0.0)
+
+    # Groove, looked up by the grid step each note started on
+    groove_amount = per_note([pattern.groove_amount for pattern in patterns])
+    step = np.rint(original_position / groove.resolution).astype(np.int64) % groove.steps
+    position += groove_amount * groove.timing[step]
+    velocity *= 1.0 + groove_amount * (groove.velocity[step] - 1.0)
+
+    # Random jitter
+    timing = per_note([pattern.timing_variation for pattern in patterns])
+    position += (2.0 * _random(seeds, index * _STREAMS + _TIMING_STREAM) - 1.0) * timing
+    velocity_variation = per_note([pattern.velocity_variation for pattern in patterns])
+    velocity += ((2.0 * _random(seeds, index * _STREAMS + _VELOCITY_STREAM) - 1.0)
+                 * velocity_variation * MAX_VELOCITY_JITTER)
+
+    # Notes stay inside their pattern and the MIDI velocity range
+    end = np.nextafter(per_note([pattern.get_duration_beats() for pattern in patterns]), 0)
+    position = np.clip(position, 0.0, np.maximum(end, 0.0))
+    velocity = np.clip(np.rint(velocity), 1, 127)
+
+    keep = _random(seeds, index * _STREAMS + _DROPOUT_STREAM) < probability
+    # Restore position order within each pattern if notes passed each other
+    # (lexsort is stable: ties keep their order)
+    passed = (position[1:] < position[:-1]) & (segment[1:] == segment[:-1])
+    if passed.any():
+        order = np.lexsort((position, segment))
+        order = order[keep[order]]
+    else:
+        order = np.flatnonzero(keep)
+
+    columns = {
+        'pitch': pitch[order],
+        'velocity': velocity[order].astype(np.uint8),
+        'position': position[order],
+        'duration': duration[order],
+        'probability': np.ones(len(order)),
+        'channel': channel[order],
+    }
+    ends = np.cumsum(np.bincount(segment[order], minlength=len(patterns))).tolist()
+    return [
+        NoteArray(**{name: column[start:end] for name, column in columns.items()})
+        for start, end in zip([0] + ends[:-1], ends)
+    ]
+
+def performed_pattern(pattern: MidiPattern, notes: NoteArray) -> MidiPattern:
+    """Copy of a pattern with its performed notes and no performance settings left"""
+    return replace(
+        pattern,
+        notes=notes,
+        swing_amount=0.0,
+        groove_amount=0.0,
+        velocity_variation=0.0,
+        timing_variation=0.0,
+        control_changes=list(pattern.control_changes),
+        automations=list(pattern.automations),
+        metadata=dict(pattern.metadata)
+    )
+
+def perform_clips(clip_index: ClipIndex, seed: int = 0,
+                  groove: Groove = DEFAULT_GROOVE) -> ClipIndex:
+    """Index of the same clips playing their performed patterns, rendered in one call"""
+    keys = list(clip_index.keys())
+    rendered = iter(render_performances(
+        [clip.pattern for key in keys for clip in clip_index.get(*key)], seed, groove
+    ))
+    performed = ClipIndex()
+    for key in keys:
+        performed.add(*key, [
+            replace(clip, pattern=performed_pattern(clip.pattern, next(rendered)))
+            for clip in clip_index.get(*key)
+        ])
+    return performed
@@ -0,0 +1,122 @@
+from typing import BinaryIO, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+class XmlStreamWriter:
+    """Write XML events straight to one or more binary streams.
+
+    Output is encoded and flushed to the sinks in chunks of at most
+    ``chunk_size`` bytes, so memory use does not grow with the document.
+
+    A writer created with ``fragment_depth`` renders a fragment meant to be
+    inserted with raw() into a document at that depth, formatted exactly
+    as if it had been written there directly.
+    """
+
+    def __init__(self, sinks: Sequence[BinaryIO], pretty: bool = False,
+                 indent: str = "  ", chunk_size: int = 64 * 1024,
+                 fragment_depth: Optional[int] = None):
+        self.sinks = list(sinks)
+        self.pretty = pretty
+        self.indent = indent
+        self.chunk_size = chunk_size
+        self._fragment = fragment_depth is not None
+        self._base_depth = fragment_depth or 0
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._stack: List[str] = []
+        self._open_tag = False      # Start tag written but not yet closed with '>'
+        self._has_children: List[bool] = []
+        self._started = self._fragment   # A fragment starts on a new line
+
+    def declaration(self) -> None:
+        """Write the XML declaration"""
+        self._write('<?xml version="1.0" encoding="UTF-8"?>')
+
+    def start(self, tag: str, attrs: Optional[Dict[str, str]] = None) -> None:
+        """Open an element"""
+        self._close_open_tag()
+        self._newline()
+        if self._has_children:
+            self._has_children[-1] = True
+        self._write(f"<{tag}{self._format_attrs(attrs)}")
+        self._stack.append(tag)
+        self._has_children.append(False)
+        self._open_tag = True
+
+    def end(self) -> None:
+        """Close the innermost open element"""
+        tag = self._stack.pop()
+        has_children = self._has_children.pop()
+        if self._open_tag:
+            self._write(" />" if self.pretty else "/>")
+            self._open_tag = False
+            return
+        if has_children:
+            self._newline()
+        self._write(f"</{tag}>")
+
+    def element(self, tag: str, attrs: Optional[Dict[str, str]] = None,
+                text: Optional[str] = None) -> None:
+        """Write a complete element with optional text content"""
+        self._close_open_tag()
+        self._newline()
+        if self._has_children:
+            self._has_children[-1] = True
+        if text is None:
+            self._write(f"<{tag}{self._format_attrs(attrs)}{' />' if self.pretty else '/>'}")
+        else:
+            self._write(f"<{tag}{self._format_attrs(attrs)}>{escape(text)}</{tag}>")
+
+    def raw(self, fragment: bytes) -> None:
+        """Insert encoded XML, such as a fragment rendered for this depth"""
+        self._close_open_tag()
+        if self._has_children:
+            self._has_children[-1] = True
+        self.flush()
+        for sink in self.sinks:
+            sink.write(fragment)
+        self._started = True
+
+    @property
+    def depth(self) -> int:
+        """Number of currently open elements"""
+        return self._base_depth + len(self._stack)
+
+    def flush(self) -> None:
+        """Encode buffered output and hand it to the sinks"""
+        if not self._buffer:
+            return
+        data = "".join(self._buffer).encode("utf-8")
+        self._buffer.clear()
+        self._buffered = 0
+        for sink in self.sinks:
+            sink.write(data)
+
+    def close(self) -> None:
+        """Close any open elements and flush remaining output"""
+        while self._stack:
+            self.end()
+        if self.pretty and not self._fragment:
+            self._write("\n")
+        self.flush()
+
+    def _format_attrs(self, attrs: Optional[Dict[str, str]]) -> str:
+        if not attrs:
+            return ""
+        return "".join(f" {name}={quoteattr(value)}" for name, value in attrs.items())
+
+    def _close_open_tag(self) -> None:
+        if self._open_tag:
+            self._write(">")
+            self._open_tag = False
+
+    def _newline(self) -> None:
+        if self.pretty and self._started:
+            self._write("\n" + self.indent * self.depth)
+
+    def _write(self, data: str) -> None:
+        self._started = True
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunk_size:
+            self.flush()
@@ -0,0 +1,49 @@
+"""Models module for template generation."""
+
+from ..utils.lazy import lazy_exports
+
+__all__ = [
+    'Track',
+    'TrackType',
+    'ColorCode',
+    'Group',
+    'Template',
+    'TimelineMarker',
+    'TimelineSection',
+    'Timeline',
+    'TimeSignature',
+    'MidiNote',
+    'MidiCC',
+    'MidiPattern',
+    'NoteArray',
+    'SessionClip',
+    'PatternVariation',
+    'NoteLength',
+    'Velocity',
+    'AutomationPoint',
+    'AutomationEnvelope',
+    'Groove'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Track': '.track',
+    'TrackType': '.track',
+    'ColorCode': '.track',
+    'Group': '.group',
+    'Template': '.template',
+    'TimelineMarker': '.timeline',
+    'TimelineSection': '.timeline',
+    'Timeline': '.timeline',
+    'TimeSignature': '.timeline',
+    'MidiNote': '.midi_pattern',
+    'MidiCC': '.midi_pattern',
+    'MidiPattern': '.midi_pattern',
+    'NoteArray': '.midi_pattern',
+    'SessionClip': '.midi_pattern',
+    'PatternVariation': '.midi_pattern',
+    'NoteLength': '.midi_pattern',
+    'Velocity': '.midi_pattern',
+    'AutomationPoint': '.midi_pattern',
+    'AutomationEnvelope': '.midi_pattern',
+    'Groove': '.groove'
+})
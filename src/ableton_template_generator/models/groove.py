@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+
+from .midi_pattern import MidiPattern, NoteArray
+
+@dataclass
+class Groove:
+    """Timing and velocity feel of a pattern as lookup tables over a grid.
+
+    The grid has one step every ``resolution`` beats and repeats every
+    ``len(timing)`` steps (one bar when extracted). For each step, ``timing``
+    holds the offset in beats of notes from the grid line and ``velocity``
+    their velocity relative to the pattern's mean velocity. Steps without
+    notes have offset 0.0 and scale 1.0.
+    """
+    resolution: float       # Grid step in beats, e.g. 0.25 for sixteenths
+    timing: np.ndarray      # Offset from the grid line in beats, per step
+    velocity: np.ndarray    # Velocity scale, per step
+    name: str = ""
+
+    def __post_init__(self):
+        self.timing = np.asarray(self.timing, dtype=np.float64)
+        self.velocity = np.asarray(self.velocity, dtype=np.float64)
+        if self.resolution <= 0:
+            raise ValueError("Groove resolution must be positive")
+        if not len(self.timing) or self.timing.shape != self.velocity.shape:
+            raise ValueError("Groove tables must be non-empty and of equal length")
+
+    @property
+    def steps(self) -> int:
+        """Grid steps per groove cycle"""
+        return len(self.timing)
+
+    @classmethod
+    def extract(cls, pattern: MidiPattern, resolution: float = 0.25) -> 'Groove':
+        """Capture a pattern's feel on a grid, one bar per cycle"""
+        beats_per_bar = pattern.time_signature_numerator * 4 / pattern.time_signature_denominator
+        steps = max(1, int(round(beats_per_bar / resolution)))
+        notes = pattern.notes
+
+        grid = np.rint(notes.position / resolution)
+        offset = notes.position - grid * resolution
+        step = grid.astype(np.int64) % steps
+        counts = np.bincount(step, minlength=steps)
+        played = counts > 0
+        mean_velocity = float(np.mean(notes.velocity)) if len(notes) else 0.0
+
+        timing = np.zeros(steps)
+        velocity = np.ones(steps)
+        timing[played] = np.bincount(step, weights=offset, minlength=steps)[played] / counts[played]
+        if mean_velocity > 0:
+            velocity_sum = np.bincount(step, weights=notes.velocity.astype(np.float64), minlength=steps)
+            velocity[played] = velocity_sum[played] / counts[played] / mean_velocity
+        return cls(resolution=resolution, timing=timing, velocity=velocity, name=pattern.name)
+
+    def apply(self, notes: NoteArray, amount: float = 1.0) -> NoteArray:
+        """Move notes towards the groove's timing and scale their velocity.
+
+        Each note is matched to its nearest grid line; ``amount`` blends
+        between the note as it is (0.0) and the note on the grid line plus the
+        groove's offset, with the groove's velocity scale (1.0).
+        """
+        grid = np.rint(notes.position / self.resolution)
+        step = grid.astype(np.int64) % self.steps
+        target = grid * self.resolution + self.timing[step]
+        position = np.maximum(notes.position + amount * (target - notes.position), 0.0)
+        velocity = notes.velocity * (1.0 + amount * (self.velocity[step] - 1.0))
+        return NoteArray(
+            pitch=notes.pitch,
+            velocity=np.clip(np.rint(velocity), 1, 127).astype(np.uint8),
+            position=position,
+            duration=notes.duration,
+            probability=notes.probability,
+            channel=notes.channel
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-compatible dictionary"""
+        return {
+            'name': self.name,
+            'resolution': self.resolution,
+            'timing': self.timing.tolist(),
+            'velocity': self.velocity.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Groove':
+        """Create from a dictionary made by to_dict"""
+        return cls(
+            resolution=data['resolution'],
+            timing=data['timing'],
+            velocity=data['velocity'],
+            name=data.get('name', "")
+        )
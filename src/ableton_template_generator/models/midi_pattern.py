@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, FrozenInstanceError, fields
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Union
 from enum import Enum
+import numpy as np
 
 class NoteLength(Enum):
     THIRTYSECOND = 0.125
@@ -63,11 +64,336 @@ class AutomationEnvelope:
     loop_start: Optional[float] = None
     loop_end: Optional[float] = None
 
+# Storage dtype of each NoteArray column, in MidiNote field order
+NOTE_COLUMNS = {
+    'pitch': np.uint8,
+    'velocity': np.uint8,
+    'position': np.float64,
+    'duration': np.float64,
+    'probability': np.float64,
+    'channel': np.uint8,
+}
+
+class _NoteView(MidiNote):
+    """A note read from a NoteArray. Setting its fields raises, since the
+    change could not be written back to the array's columns."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        object.__setattr__(self, '_frozen', True)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, '_frozen', False):
+            raise FrozenInstanceError(
+                f"cannot assign to field '{name}': notes read from a NoteArray are read-only; "
+                f"replace the note (notes[i] = note) or use set_column and the bulk operations"
+            )
+        super().__setattr__(name, value)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, MidiNote):
+            return all(getattr(self, field.name) == getattr(other, field.name) for field in fields(MidiNote))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(MidiNote(**{field.name: getattr(self, field.name) for field in fields(MidiNote)}))
+
+class NoteArray:
+    """Columnar note storage: one NumPy array per MidiNote field.
+
+    Notes are always kept sorted by position (ties keep insertion order), so
+    the position column doubles as an index for O(log n) point and window
+    queries.
+
+    Iterating or indexing with an int yields read-only MidiNote objects built
+    from the columns: setting a field raises FrozenInstanceError. The list
+    methods append, extend, remove, pop and clear, and item assignment and
+    deletion, change the notes themselves. Added notes go to their sorted
+    position, whatever index they were given.
+    """
+
+    def __init__(self, pitch: Any = (), velocity: Any = (), position: Any = (),
+                 duration: Any = (), probability: Any = None, channel: Any = None):
+        size = len(pitch)
+        if probability is None:
+            probability = np.ones(size)
+        if channel is None:
+            channel = np.zeros(size)
+        columns = {
+            'pitch': pitch,
+            'velocity': velocity,
+            'position': position,
+            'duration': duration,
+            'probability': probability,
+            'channel': channel,
+        }
+        self._columns = {name: self._as_column(name, values) for name, values in columns.items()}
+        self._size = size
+        for name, column in self._columns.items():
+            if len(column) != size:
+                raise ValueError(f"Column '{name}' has {len(column)} values, expected {size}")
+        position = self._columns['position']
+        if size > 1 and not np.all(position[1:] >= position[:-1]):
+            order = np.argsort(position, kind='stable')
+            self._columns = {name: column[order] for name, column in self._columns.items()}
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[MidiNote]) -> 'NoteArray':
+        """Build a NoteArray from MidiNote objects"""
+        notes = list(notes)
+        return cls(**{
+            name: [getattr(note, name) for note in notes]
+            for name in NOTE_COLUMNS
+        })
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'NoteArray':
+        """Build a NoteArray from note dictionaries (as stored in JSON)"""
+        records = list(records)
+        return cls(
+            pitch=[record['pitch'] for record in records],
+            velocity=[record['velocity'] for record in records],
+            position=[record['position'] for record in records],
+            duration=[record['duration'] for record in records],
+            probability=[record.get('probability', 1.0) for record in records],
+            channel=[record.get('channel', 0) for record in records]
+        )
+
+    @classmethod
+    def concatenate(cls, arrays: Iterable['NoteArray']) -> 'NoteArray':
+        """Join several NoteArrays into one"""
+        arrays = list(arrays)
+        if not arrays:
+            return cls()
+        return cls(**{
+            name: np.concatenate([array._columns[name][:array._size] for array in arrays])
+            for name in NOTE_COLUMNS
+        })
+
+    @staticmethod
+    def _as_column(name: str, values: Any) -> np.ndarray:
+        dtype = NOTE_COLUMNS[name]
+        column = np.asarray(values)
+        if column.dtype == dtype:
+            return column
+        if np.issubdtype(dtype, np.integer) and column.size:
+            limits = np.iinfo(dtype)
+            if column.min() < limits.min or column.max() > limits.max:
+                raise ValueError(f"Note {name} values out of range")
+        return column.astype(dtype)
+
+    # Column access
+    @property
+    def pitch(self) -> np.ndarray:
+        return self._columns['pitch'][:self._size]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self._columns['velocity'][:self._size]
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._columns['position'][:self._size]
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self._columns['duration'][:self._size]
+
+    @property
+    def probability(self) -> np.ndarray:
+        return self._columns['probability'][:self._size]
+
+    @property
+    def channel(self) -> np.ndarray:
+        return self._columns['channel'][:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a column by field name"""
+        return self._columns[name][:self._size]
+
+    def set_column(self, name: str, values: Any) -> None:
+        """Replace a column with new values of the same length"""
+        column = self._as_column(name, values)
+        if column.shape != (self._size,):
+            raise ValueError(f"Column '{name}' must have {self._size} values")
+        self._columns[name] = column
+
+    # Sequence protocol (MidiNote view)
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[MidiNote]:
+        rows = zip(*(self.column(name).tolist() for name in NOTE_COLUMNS))
+        return (_NoteView(*row) for row in rows)
+
+    def __getitem__(self, index: Any) -> Union[MidiNote, 'NoteArray']:
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("note index out of range")
+            return _NoteView(*(self._columns[name][index].item() for name in NOTE_COLUMNS))
+        return NoteArray(**{name: self.column(name)[index] for name in NOTE_COLUMNS})
+
+    def __setitem__(self, index: int, note: MidiNote) -> None:
+        """Replace a note; the new one moves to its sorted position"""
+        NoteArray.from_notes([note])  # Check the new values before removing the old note
+        del self[index]
+        self.insert(note)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("note index out of range")
+        elif not isinstance(index, slice):
+            raise TypeError("notes can only be deleted by int index or slice")
+        for name in NOTE_COLUMNS:
+            self._columns[name] = np.delete(self.column(name), index)
+        self._size = len(self._columns['position'])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, NoteArray):
+            return len(self) == len(other) and all(
+                np.array_equal(self.column(name), other.column(name))
+                for name in NOTE_COLUMNS
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"NoteArray({len(self)} notes)"
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert notes to dictionaries (as stored in JSON)"""
+        columns = [self.column(name).tolist() for name in NOTE_COLUMNS]
+        return [dict(zip(NOTE_COLUMNS, row)) for row in zip(*columns)]
+
+    def copy(self) -> 'NoteArray':
+        """Return an independent copy"""
+        # Read-only columns (e.g. views of a memory-mapped file) are shared:
+        # every operation replaces rather than writes into them
+        return NoteArray(**{
+            name: column if not column.flags.writeable else column.copy()
+            for name, column in ((name, self.column(name)) for name in NOTE_COLUMNS)
+        })
+
+    # Mutation
+    def insert(self, note: MidiNote) -> None:
+        """Insert a note at its sorted position, growing the columns geometrically"""
+        index = int(np.searchsorted(self.position, note.position, side='right'))
+        # Columns replaced by bulk operations have no spare capacity, and
+        # read-only ones (memory-mapped) must be copied before writing
+        columns = self._columns.values()
+        if any(len(column) == self._size or not column.flags.writeable for column in columns):
+            new_capacity = max(8, self._size * 2)
+            for name, dtype in NOTE_COLUMNS.items():
+                grown = np.empty(new_capacity, dtype=dtype)
+                grown[:self._size] = self._columns[name][:self._size]
+                self._columns[name] = grown
+        for name in NOTE_COLUMNS:
+            column = self._columns[name]
+            column[index + 1:self._size + 1] = column[index:self._size]
+            column[index] = getattr(note, name)
+        self._size += 1
+
+    def append(self, note: MidiNote) -> None:
+        """Add a note at its sorted position (as insert)"""
+        self.insert(note)
+
+    def extend(self, notes: Iterable[MidiNote]) -> None:
+        """Add notes at their sorted positions, in one pass over the columns"""
+        merged = NoteArray.concatenate([self, NoteArray.from_notes(notes)])
+        self._columns = merged._columns
+        self._size = merged._size
+
+    def remove(self, note: MidiNote) -> None:
+        """Remove the first note equal to note"""
+        low, high = self.index_range(note.position, np.nextafter(note.position, np.inf))
+        for index in range(low, high):
+            if self[index] == note:
+                del self[index]
+                return
+        raise ValueError("note not in NoteArray")
+
+    def pop(self, index: int = -1) -> MidiNote:
+        """Remove a note and return it"""
+        view = self[index]
+        del self[index]
+        return MidiNote(**{field.name: getattr(view, field.name) for field in fields(MidiNote)})
+
+    def clear(self) -> None:
+        """Remove every note"""
+        del self[:]
+
+    # Rounding to a grid is monotonic, so quantizing keeps the sort order
+
+    def quantize(self, grid: float) -> None:
+        """Snap positions and durations to a grid"""
+        self.set_column('position', np.round(self.position / grid) * grid)
+        self.set_column('duration', np.round(self.duration / grid) * grid)
+
+    def transpose(self, semitones: int) -> None:
+        """Shift pitches, leaving notes that would leave the MIDI range unchanged"""
+        shifted = self.pitch.astype(np.int16) + semitones
+        in_range = (shifted >= 0) & (shifted <= 127)
+        self.set_column('pitch', np.where(in_range, shifted, self.pitch))
+
+    # Queries
+    def filter(self, mask: np.ndarray) -> 'NoteArray':
+        """Select the notes where mask is True"""
+        return self[np.asarray(mask, dtype=bool)]
+
+    def index_range(self, start: float, end: float) -> tuple:
+        """Index bounds of the notes with start <= position < end"""
+        position = self.position
+        return (int(np.searchsorted(position, start, side='left')),
+                int(np.searchsorted(position, end, side='left')))
+
+    def in_range(self, start: float, end: float) -> 'NoteArray':
+        """Notes with start <= position < end.
+
+        The result is a view: a later insert into this array may change it.
+        """
+        low, high = self.index_range(start, end)
+        return self[low:high]
+
+    def at_position(self, position: float, tolerance: float = 0.01) -> 'NoteArray':
+        """Notes within tolerance of a position (a view, see in_range)"""
+        low = np.searchsorted(self.position, position - tolerance, side='left')
+        high = np.searchsorted(self.position, position + tolerance, side='right')
+        return self[int(low):int(high)]
+
+    def validate(self) -> bool:
+        """Validate all notes at once (see MidiNote.validate)"""
+        return bool(
+            np.all(self.pitch <= 127) and
+            np.all(self.velocity <= 127) and
+            np.all(self.position >= 0) and
+            np.all(self.duration > 0) and
+            np.all((self.probability >= 0) & (self.probability <= 1)) and
+            np.all(self.channel <= 15)
+        )
+
+def _bisect_position(items: List[Any], position: float, right: bool = False) -> int:
+    """Binary search a list of objects sorted by their position attribute"""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        item_position = items[middle].position
+        if item_position < position or (right and item_position == position):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
 @dataclass
 class MidiPattern:
     name: str
     length_bars: int
-    notes: List[MidiNote]
+    notes: NoteArray                   # Lists of MidiNote are converted on init
     time_signature_numerator: int = 4
     time_signature_denominator: int = 4
     swing_amount: float = 0.0          # 0.0 = no swing, 1.0 = maximum swing
@@ -80,31 +406,64 @@ class MidiPattern:
 
     def __post_init__(self):
         """Initialize optional fields"""
+        if not isinstance(self.notes, NoteArray):
+            self.notes = NoteArray.from_notes(self.notes or [])
         if self.control_changes is None:
             self.control_changes = []
+        else:
+            self.control_changes = sorted(self.control_changes, key=lambda cc: cc.position)
         if self.automations is None:
             self.automations = []
         if self.metadata is None:
             self.metadata = {}
 
+    def copy(self) -> 'MidiPattern':
+        """Return a copy with its own notes and event lists"""
+        return MidiPattern(
+            name=self.name,
+            length_bars=self.length_bars,
+            notes=self.notes.copy(),
+            time_signature_numerator=self.time_signature_numerator,
+            time_signature_denominator=self.time_signature_denominator,
+            swing_amount=self.swing_amount,
+            groove_amount=self.groove_amount,
+            velocity_variation=self.velocity_variation,
+            timing_variation=self.timing_variation,
+            control_changes=list(self.control_changes),
+            automations=list(self.automations),
+            metadata=dict(self.metadata)
+        )
+
     def get_duration_beats(self) -> float:
         """Get total duration in beats"""
         return self.length_bars * self.time_signature_numerator
 
     def get_notes_at_position(self, position: float, tolerance: float = 0.01) -> List[MidiNote]:
         """Get all notes at a specific position"""
-        return [
-            note for note in self.notes
-            if abs(note.position - position) <= tolerance
-        ]
+        return list(self.notes.at_position(position, tolerance))
+
+    def get_notes_in_range(self, start: float, end: float) -> List[MidiNote]:
+        """Get all notes starting between start (inclusive) and end (exclusive)"""
+        return list(self.notes.in_range(start, end))
 
     def add_note(self, note: MidiNote) -> None:
         """Add a note to the pattern"""
         if note.validate():
-            self.notes.append(note)
+            self.notes.insert(note)
         else:
             raise ValueError("Invalid MIDI note parameters")
 
+    def add_control_change(self, control_change: MidiCC) -> None:
+        """Add a control change, keeping control changes sorted by position"""
+        index = _bisect_position(self.control_changes, control_change.position, right=True)
+        self.control_changes.insert(index, control_change)
+
+    def get_control_changes_in_range(self, start: float, end: float) -> List[MidiCC]:
+        """Get all control changes between start (inclusive) and end (exclusive)"""
+        low = _bisect_position(self.control_changes, start)
+        high = _bisect_position(self.control_changes, end)
+        return self.control_changes[low:high]
+
     def add_automation(self, parameter: str, points: List[AutomationPoint]) -> None:
         """Add an automation envelope"""
         envelope = AutomationEnvelope(parameter_name=parameter, points=points)
@@ -112,16 +471,11 @@ class MidiPattern:
 
     def quantize_notes(self, grid: float = 0.25) -> None:
         """Quantize notes to a specific grid"""
-        for note in self.notes:
-            note.position = round(note.position / grid) * grid
-            note.duration = round(note.duration / grid) * grid
+        self.notes.quantize(grid)
 
     def transpose(self, semitones: int) -> None:
         """Transpose all notes by a number of semitones"""
-        for note in self.notes:
-            new_pitch = note.pitch + semitones
-            if 0 <= new_pitch <= 127:
-                note.pitch = new_pitch
+        self.notes.transpose(semitones)
 
 @dataclass
 class SessionClip:
@@ -152,6 +506,25 @@ class SessionClip:
             follow_action_time=self.follow_action_time
         )
 
+# Variation types and the changes they make
+VARIATION_CHANGES = {
+    'velocity': {'velocity'},
+    'timing': {'timing'},
+    'notes': {'notes'},
+    'combination': {'velocity', 'timing', 'notes'},
+}
+
+# Scale of each change at variation_amount 1.0
+MAX_VELOCITY_DEVIATION = 24     # Standard deviation of velocity changes
+MAX_TIMING_SHIFT = 0.125        # Largest timing shift in beats (a 32nd note)
+RHYTHM_STEP = 0.25              # Grid step notes move by when the rhythm may change
+MAX_STEP_MOVE_RATE = 0.25       # Share of notes moved a grid step
+MAX_PITCH_CHANGE_RATE = 0.5     # Share of notes given another pitch of the pattern
+MAX_DROP_RATE = 0.3             # Share of notes left out
+
+# Notes varied per vectorized pass; larger batches are split into chunks
+VARIATION_CHUNK_NOTES = 1 << 18
+
 @dataclass
 class PatternVariation:
     """Represents a variation of a base pattern"""
@@ -160,9 +533,112 @@ class PatternVariation:
     variation_amount: float  # 0.0 = minimal variation, 1.0 = maximum variation
     preserve_rhythm: bool = True
     preserve_pitches: bool = False
-    
+    seed: Optional[int] = None  # Seed for reproducible variations (None = random)
+
     def generate(self) -> MidiPattern:
         """Generate a new pattern based on the variation settings"""
-        # Implementation would depend on the variation type
-        # This would contain the logic for creating variations
-        pass
\ No newline at end of file
+        return self.generate_batch(1)[0]
+
+    def generate_batch(self, count: int, seed: Optional[int] = None) -> List[MidiPattern]:
+        """Generate several variations of the base pattern in one pass.
+
+        The notes of all variations are varied together as (count, notes)
+        arrays. Each kind of change draws from its own seeded stream, so the
+        first k variations of a batch are the same for any count >= k.
+
+        velocity     velocities spread normally around the original
+        timing       notes shifted by up to MAX_TIMING_SHIFT beats and, unless
+                     preserve_rhythm, some moved by a whole RHYTHM_STEP
+        notes        unless preserve_pitches, some notes take another pitch
+                     used in the pattern; unless preserve_rhythm, some notes
+                     are left out
+        combination  all of the above
+        """
+        changes = VARIATION_CHANGES.get(self.variation_type)
+        if changes is None:
+            raise ValueError(f"Unknown variation type: {self.variation_type}")
+        if count < 0:
+            raise ValueError("count must not be negative")
+        streams = [
+            np.random.default_rng(child) for child in
+            np.random.SeedSequence(self.seed if seed is None else seed).spawn(5)
+        ]
+        # Bound the size of the (variations, notes) arrays; chunks draw from
+        # the streams in turn, so chunking does not change the results
+        chunk = max(1, VARIATION_CHUNK_NOTES // max(len(self.base_pattern.notes), 1))
+        variations = []
+        for start in range(0, count, chunk):
+            variations.extend(self._generate_chunk(start, min(chunk, count - start), changes, streams))
+        return variations
+
+    def _generate_chunk(self, start: int, count: int, changes: set,
+                        streams: List[np.random.Generator]) -> List[MidiPattern]:
+        amount = min(max(self.variation_amount, 0.0), 1.0)
+        base = self.base_pattern
+        notes = base.notes
+        size = len(notes)
+        velocity_rng, timing_rng, step_rng, pitch_rng, drop_rng = streams
+
+        shape = (count, size)
+        columns = {name: np.broadcast_to(notes.column(name), shape) for name in NOTE_COLUMNS}
+        keep = None
+
+        if 'velocity' in changes:
+            deviation = velocity_rng.standard_normal(shape) * (amount * MAX_VELOCITY_DEVIATION)
+            columns['velocity'] = np.clip(np.rint(columns['velocity'] + deviation), 1, 127).astype(np.uint8)
+
+        if 'notes' in changes:
+            if not self.preserve_pitches and size and amount:
+                choices = np.unique(notes.pitch)
+                # One draw per note decides both whether and to which pitch it changes
+                draw = pitch_rng.random(shape) / (amount * MAX_PITCH_CHANGE_RATE)
+                changed = draw < 1.0
+                replacement = choices[np.minimum(draw * len(choices), len(choices) - 1).astype(np.intp)]
+                columns['pitch'] = np.where(changed, replacement, columns['pitch'])
+            if not self.preserve_rhythm:
+                keep = drop_rng.random(shape) >= amount * MAX_DROP_RATE
+
+        if 'timing' in changes:
+            position = columns['position'] + timing_rng.uniform(-1.0, 1.0, shape) * (amount * MAX_TIMING_SHIFT)
+            if not self.preserve_rhythm:
+                # One draw per note decides both whether and which way it moves
+                draw = step_rng.random(shape)
+                rate = amount * MAX_STEP_MOVE_RATE
+                position += np.where(draw < rate / 2, -RHYTHM_STEP, np.where(draw < rate, RHYTHM_STEP, 0.0))
+            # Notes stay inside the pattern
+            end = max(np.nextafter(base.get_duration_beats(), 0), 0.0)
+            columns['position'] = np.clip(position, 0.0, end)
+
+            # Shifted notes may pass their neighbours: restore the position
+            # order of each variation (stable, so ties keep their order)
+            order = np.argsort(columns['position'], axis=1, kind='stable')
+            columns = {name: np.take_along_axis(column, order, axis=1) for name, column in columns.items()}
+            if keep is not None:
+                keep = np.take_along_axis(keep, order, axis=1)
+
+        variations = []
+        for index in range(count):
+            if keep is None:
+                rows = {name: np.array(column[index]) for name, column in columns.items()}
+            else:
+                rows = {name: column[index][keep[index]] for name, column in columns.items()}
+            variations.append(MidiPattern(
+                name=f"{base.name} ({self.variation_type} {start + index + 1})",
+                length_bars=base.length_bars,
+                notes=NoteArray(**rows),
+                time_signature_numerator=base.time_signature_numerator,
+                time_signature_denominator=base.time_signature_denominator,
+                swing_amount=base.swing_amount,
+                groove_amount=base.groove_amount,
+                velocity_variation=base.velocity_variation,
+                timing_variation=base.timing_variation,
+                control_changes=list(base.control_changes),
+                automations=list(base.automations),
+                metadata={
+                    **base.metadata,
+                    'variation_of': base.name,
+                    'variation_type': self.variation_type,
+                    'variation_index': start + index
+                }
+            ))
+        return variations
@@ -1,6 +1,7 @@
 # src/ableton_template_generator/models/timeline.py
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Iterable, MutableSequence
+from bisect import bisect_left, bisect_right
 from enum import Enum
 import math
 
@@ -91,106 +92,303 @@ class TimelineSection:
     def end_bar(self) -> int:
         return self.start_bar + self.length_bars
 
+class _SortedIntervals:
+    """Items kept sorted by start bar, with a parallel list of starts for bisect.
+
+    Lookups by containment assume the intervals do not overlap, so the
+    interval starting closest before a bar is the only one that can contain it.
+
+    Inserting shifts the lists, which is O(n), but a memmove of pointers:
+    timelines hold tens to thousands of items, well below the size at which
+    a balanced tree or skip list would pay for itself, and lookups stay
+    plain bisects over a list.
+    """
+
+    def __init__(self, start_of: Callable[[Any], int], end_of: Callable[[Any], int]):
+        self.start_of = start_of
+        self.end_of = end_of
+        self.items: List[Any] = []
+        self.starts: List[int] = []
+        self.max_end: Optional[int] = None
+
+    def insert(self, item: Any) -> None:
+        """Insert after any items with the same start"""
+        start = self.start_of(item)
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.items.insert(index, item)
+        end = self.end_of(item)
+        self.max_end = end if self.max_end is None else max(self.max_end, end)
+
+    def remove(self, item: Any) -> bool:
+        """Remove an item (compared by identity); False if it is not here"""
+        start = self.start_of(item)
+        for index in range(bisect_left(self.starts, start), bisect_right(self.starts, start)):
+            if self.items[index] is item:
+                del self.starts[index]
+                del self.items[index]
+                if self.max_end is not None and self.end_of(item) >= self.max_end:
+                    self.max_end = max(map(self.end_of, self.items), default=None)
+                return True
+        return False
+
+    def last_starting_before(self, bar: int) -> Optional[Any]:
+        """The last item with start < bar"""
+        index = bisect_left(self.starts, bar) - 1
+        return self.items[index] if index >= 0 else None
+
+    def containing(self, bar: int) -> Optional[Any]:
+        """The interval with start <= bar < end"""
+        index = bisect_right(self.starts, bar) - 1
+        if index >= 0 and bar < self.end_of(self.items[index]):
+            return self.items[index]
+        return None
+
+    def starting_in(self, start_bar: int, end_bar: int, include_start: bool = True) -> List[Any]:
+        """Items with start_bar <= start < end_bar (start_bar < start if not include_start)"""
+        if include_start:
+            low = bisect_left(self.starts, start_bar)
+        else:
+            low = bisect_right(self.starts, start_bar)
+        high = bisect_left(self.starts, end_bar)
+        return self.items[low:high]
+
+def _has_overlap(items: List[Any], start_of: Callable[[Any], int],
+                   end_of: Callable[[Any], int]) -> bool:
+    """Sweep items sorted by start and report whether any two overlap.
+
+    Items of zero length only overlap items that start strictly before them.
+    """
+    max_end = None          # Over items with a length seen so far
+    max_end_before = None   # Same, but only items starting before the current start
+    current_start = None
+    for item in items:
+        start, end = start_of(item), end_of(item)
+        if start != current_start:
+            max_end_before = max_end
+            current_start = start
+        if end > start:
+            if max_end is not None and start < max_end:
+                return True
+            max_end = end if max_end is None else max(max_end, end)
+        elif max_end_before is not None and start < max_end_before:
+            return True
+    return False
+
+class _TimelineItems(MutableSequence):
+    """List-like view of a timeline's markers or sections, kept sorted.
+
+    Reads go straight to the timeline's index. Adding an item goes through
+    the timeline's add method, so it is checked for overlaps and lands at
+    its sorted position whatever index it is given. sort() is therefore a
+    no-op, and reverse() is not supported.
+    """
+
+    def __init__(self, intervals: _SortedIntervals, add: Callable[[Any], None],
+                 remove: Callable[[Any], None]):
+        self._intervals = intervals
+        self._add = add
+        self._remove = remove
+
+    def __len__(self) -> int:
+        return len(self._intervals.items)
+
+    def __getitem__(self, index):
+        return self._intervals.items[index]
+
+    def __iter__(self):
+        return iter(self._intervals.items)
+
+    def __setitem__(self, index, item) -> None:
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment is not supported; remove and add items instead")
+        old = self._intervals.items[index]
+        self._remove(old)
+        try:
+            self._add(item)
+        except ValueError:
+            self._add(old)
+            raise
+
+    def __delitem__(self, index) -> None:
+        items = self._intervals.items[index]
+        for item in (items if isinstance(index, slice) else [items]):
+            self._remove(item)
+
+    def insert(self, index: int, item: Any) -> None:
+        self._add(item)
+
+    def sort(self, *args, **kwargs) -> None:
+        """Items are always sorted"""
+
+    def reverse(self) -> None:
+        raise TypeError("Timeline items are kept sorted and cannot be reversed")
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, _TimelineItems):
+            other = other._intervals.items
+        return self._intervals.items == list(other) if isinstance(other, (list, tuple)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._intervals.items)
+
+def _replace_all(old: List[Any], new: List[Any], add: Callable[[Any], None],
+                 remove: Callable[[Any], None]) -> None:
+    """Replace every item, restoring the old ones if a new one is rejected"""
+    for item in old:
+        remove(item)
+    added = []
+    try:
+        for item in new:
+            add(item)
+            added.append(item)
+    except ValueError:
+        for item in added:
+            remove(item)
+        for item in old:
+            add(item)
+        raise
+
 class Timeline:
     def __init__(self):
-        self.markers: List[TimelineMarker] = []
-        self.sections: List[TimelineSection] = []
+        # Everything sorted by start, plus separate indexes of the items with a
+        # length: those never overlap each other, so containment is a bisect.
+        self._markers = _SortedIntervals(lambda m: m.position_bars, lambda m: m.end_position_bars)
+        self._ranged_markers = _SortedIntervals(lambda m: m.position_bars, lambda m: m.end_position_bars)
+        self._sections = _SortedIntervals(lambda s: s.start_bar, lambda s: s.end_bar)
+        self._ranged_sections = _SortedIntervals(lambda s: s.start_bar, lambda s: s.end_bar)
         self.default_tempo: float = 120.0
         self.default_time_signature: TimeSignature = TimeSignature()
 
+    @property
+    def markers(self) -> MutableSequence[TimelineMarker]:
+        """Markers sorted by position, as a list that adds through add_marker"""
+        return _TimelineItems(self._markers, self.add_marker, self.remove_marker)
+
+    @markers.setter
+    def markers(self, markers: Iterable[TimelineMarker]) -> None:
+        _replace_all(list(self._markers.items), list(markers), self.add_marker, self.remove_marker)
+
+    @property
+    def sections(self) -> MutableSequence[TimelineSection]:
+        """Sections sorted by start bar, as a list that adds through add_section"""
+        return _TimelineItems(self._sections, self.add_section, self.remove_section)
+
+    @sections.setter
+    def sections(self, sections: Iterable[TimelineSection]) -> None:
+        _replace_all(list(self._sections.items), list(sections), self.add_section, self.remove_section)
+
     def add_marker(self, marker: TimelineMarker) -> None:
         """Add a marker to the timeline"""
         # Check for overlaps if marker has duration
         if marker.duration_bars > 0:
-            for existing_marker in self.markers:
-                if marker.overlaps_with(existing_marker):
-                    raise ValueError(
-                        f"Marker '{marker.name}' overlaps with existing marker '{existing_marker.name}'"
-                    )
-        self.markers.append(marker)
-        self.markers.sort(key=lambda m: m.position_bars)
+            existing_marker = self._find_overlap(
+                marker, marker.position_bars, marker.end_position_bars,
+                self._markers, self._ranged_markers, lambda m: m.overlaps_with(marker)
+            )
+            if existing_marker is not None:
+                raise ValueError(
+                    f"Marker '{marker.name}' overlaps with existing marker '{existing_marker.name}'"
+                )
+            self._ranged_markers.insert(marker)
+        self._markers.insert(marker)
 
     def add_section(self, section: TimelineSection) -> None:
         """Add a section to the timeline"""
         # Check for overlaps
-        for existing_section in self.sections:
-            if (section.start_bar < existing_section.end_bar and
-                existing_section.start_bar < section.end_bar):
-                raise ValueError(
-                    f"Section '{section.name}' overlaps with existing section '{existing_section.name}'"
-                )
-        self.sections.append(section)
-        self.sections.sort(key=lambda s: s.start_bar)
+        existing_section = self._find_overlap(
+            section, section.start_bar, section.end_bar,
+            self._sections, self._ranged_sections,
+            lambda s: section.start_bar < s.end_bar and s.start_bar < section.end_bar
+        )
+        if existing_section is not None:
+            raise ValueError(
+                f"Section '{section.name}' overlaps with existing section '{existing_section.name}'"
+            )
+        if section.length_bars > 0:
+            self._ranged_sections.insert(section)
+        self._sections.insert(section)
+
+    def remove_marker(self, marker: TimelineMarker) -> None:
+        """Remove a marker from the timeline"""
+        if not self._markers.remove(marker):
+            raise ValueError(f"Marker '{marker.name}' is not in the timeline")
+        self._ranged_markers.remove(marker)
+
+    def remove_section(self, section: TimelineSection) -> None:
+        """Remove a section from the timeline"""
+        if not self._sections.remove(section):
+            raise ValueError(f"Section '{section.name}' is not in the timeline")
+        self._ranged_sections.remove(section)
+
+    def _find_overlap(self, item: Any, start_bar: int, end_bar: int,
+                      everything: _SortedIntervals, ranged: _SortedIntervals,
+                      overlaps: Callable[[Any], bool]) -> Optional[Any]:
+        """Find an existing item overlapping [start_bar, end_bar)"""
+        # Of the items with a length, only the last one starting before our
+        # end can reach into us. Zero length items overlap when strictly inside.
+        candidates = [ranged.last_starting_before(end_bar)]
+        candidates += everything.starting_in(start_bar, end_bar, include_start=False)
+        for candidate in candidates:
+            if candidate is not None and overlaps(candidate):
+                return candidate
+        return None
 
     def get_marker_at_position(self, bar: int) -> Optional[TimelineMarker]:
         """Get marker at specific bar position"""
-        for marker in self.markers:
-            if marker.position_bars <= bar < marker.end_position_bars:
-                return marker
-        return None
+        return self._ranged_markers.containing(bar)
 
     def get_section_at_position(self, bar: int) -> Optional[TimelineSection]:
         """Get section at specific bar position"""
-        for section in self.sections:
-            if section.start_bar <= bar < section.end_bar:
-                return section
-        return None
+        return self._ranged_sections.containing(bar)
 
     def get_markers_in_range(self, start_bar: int, end_bar: int) -> List[TimelineMarker]:
         """Get all markers within a range of bars"""
-        return [
-            marker for marker in self.markers
-            if (marker.position_bars >= start_bar and
-                marker.position_bars < end_bar)
-        ]
+        return self._markers.starting_in(start_bar, end_bar)
 
     def get_sections_in_range(self, start_bar: int, end_bar: int) -> List[TimelineSection]:
         """Get all sections within a range of bars"""
-        return [
-            section for section in self.sections
-            if (section.start_bar < end_bar and
-                section.end_bar > start_bar)
-        ]
+        sections = []
+        # Only one section can start before the range and still reach into it
+        previous = self._ranged_sections.last_starting_before(start_bar)
+        if previous is not None and previous.end_bar > start_bar and previous.start_bar < end_bar:
+            sections.append(previous)
+        sections.extend(
+            section for section in self._sections.starting_in(start_bar, end_bar)
+            if section.end_bar > start_bar
+        )
+        return sections
 
     def get_total_bars(self) -> int:
         """Get total length of timeline in bars"""
-        if not self.sections and not self.markers:
+        if not self._sections.items and not self._markers.items:
             return 0
-        
-        last_section_end = max(
-            (section.end_bar for section in self.sections),
-            default=0
-        )
-        last_marker_end = max(
-            (marker.end_position_bars for marker in self.markers),
-            default=0
-        )
+        last_section_end = self._sections.max_end if self._sections.items else 0
+        last_marker_end = self._markers.max_end if self._markers.items else 0
         return max(last_section_end, last_marker_end)
 
     def validate(self) -> bool:
         """Validate timeline structure"""
         try:
             # Check for overlapping markers with duration
-            for i, marker1 in enumerate(self.markers):
-                if marker1.duration_bars > 0:
-                    for marker2 in self.markers[i+1:]:
-                        if marker1.overlaps_with(marker2):
-                            return False
+            if _has_overlap(self._markers.items, lambda m: m.position_bars, lambda m: m.end_position_bars):
+                return False
 
             # Check for overlapping sections
-            for i, section1 in enumerate(self.sections):
-                for section2 in self.sections[i+1:]:
-                    if (section1.start_bar < section2.end_bar and
-                        section2.start_bar < section1.end_bar):
-                        return False
-
-            # Ensure markers are within sections if both are used
-            if self.sections and self.markers:
-                timeline_length = self.get_total_bars()
-                for bar in range(timeline_length):
-                    if self.get_section_at_position(bar) is None:
-                        return False
+            if _has_overlap(self._sections.items, lambda s: s.start_bar, lambda s: s.end_bar):
+                return False
+
+            # Ensure markers are within sections if both are used: sweep the
+            # sections in order and look for the first uncovered bar
+            if self._sections.items and self._markers.items:
+                covered_until = 0
+                for section in self._ranged_sections.items:
+                    if section.start_bar > covered_until:
+                        break
+                    covered_until = max(covered_until, section.end_bar)
+                if covered_until < self.get_total_bars():
+                    return False
 
             return True
         except Exception:
-            return False
\ No newline at end of file
+            return False
@@ -1,9 +1,13 @@
 """Data access layer for template and pattern storage."""
 
-from .template_repository import TemplateRepository
-from .pattern_repository import PatternRepository
+from ..utils.lazy import lazy_exports
 
 __all__ = [
     'TemplateRepository',
     'PatternRepository'
-]
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'TemplateRepository': '.template_repository',
+    'PatternRepository': '.pattern_repository'
+})
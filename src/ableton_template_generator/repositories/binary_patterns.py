@@ -0,0 +1,263 @@
+"""Compact binary pattern library format.
+
+A binary library holds the same data as a ``<genre>_patterns.json`` file:
+
+    header      magic, format version, directory length, and the row count
+                and offset of each table (``HEADER``)
+    directory   UTF-8 JSON: per instrument, each clip's scalar fields plus
+                the first row and row count of its notes, control changes
+                and automation points in the tables
+    tables      fixed-width records (``NOTE_RECORD``, ``CC_RECORD``,
+                ``POINT_RECORD``), clip after clip, each in position order
+
+The file is memory-mapped and the note columns of a clip are NumPy views
+into the mapping, so notes are never parsed or copied when loading.
+All values are little-endian.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from ..models.midi_pattern import (
+    MidiPattern,
+    MidiCC,
+    NoteArray,
+    NOTE_COLUMNS,
+    SessionClip,
+    AutomationEnvelope,
+    AutomationPoint
+)
+
+MAGIC = b"ATGP"
+FORMAT_VERSION = 1
+SUFFIX = ".atgp"
+
+# magic, version, reserved, directory length, then (rows, offset) per table
+HEADER = struct.Struct("<4sHHIQQQQQQ")
+
+# 32 bytes per note; same field dtypes as the NoteArray columns
+NOTE_RECORD = np.dtype([
+    ('position', '<f8'),
+    ('duration', '<f8'),
+    ('probability', '<f8'),
+    ('pitch', 'u1'),
+    ('velocity', 'u1'),
+    ('channel', 'u1'),
+    ('padding', 'V5'),
+])
+
+# 16 bytes per control change
+CC_RECORD = np.dtype([
+    ('position', '<f8'),
+    ('controller', 'u1'),
+    ('value', 'u1'),
+    ('channel', 'u1'),
+    ('padding', 'V5'),
+])
+
+# 24 bytes per automation point
+POINT_RECORD = np.dtype([
+    ('position', '<f8'),
+    ('value', '<f8'),
+    ('curve', '<f8'),
+])
+
+# Clips without a "time_signature" entry are in 4/4
+DEFAULT_TIME_SIGNATURE = [4, 4]
+
+# MidiPattern performance settings stored with clips; missing ones are 0.0
+PERFORMANCE_FIELDS = ('swing_amount', 'groove_amount', 'velocity_variation', 'timing_variation')
+
+# Tables start on 8-byte boundaries so their float fields are aligned
+_ALIGNMENT = 8
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+class BinaryPatternFile:
+    """Memory-mapped binary pattern library"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"Truncated pattern file: {self.path}")
+        (magic, version, _, directory_length,
+         note_count, notes_offset, cc_count, ccs_offset,
+         point_count, points_offset) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary pattern file: {self.path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported pattern file version {version}: {self.path}")
+
+        directory = self._mmap[HEADER.size:HEADER.size + directory_length]
+        self.instruments: Dict[str, Dict[str, Any]] = json.loads(directory.decode('utf-8'))
+        self.notes = self._table(NOTE_RECORD, note_count, notes_offset)
+        self.control_changes = self._table(CC_RECORD, cc_count, ccs_offset)
+        self.points = self._table(POINT_RECORD, point_count, points_offset)
+
+    def _table(self, dtype: np.dtype, count: int, offset: int) -> np.ndarray:
+        if offset + count * dtype.itemsize > len(self._mmap):
+            raise ValueError(f"Truncated pattern file: {self.path}")
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+
+    def note_array(self, start: int, count: int) -> NoteArray:
+        """Read-only NoteArray viewing rows of the note table"""
+        rows = self.notes[start:start + count]
+        return NoteArray(**{name: rows[name] for name in NOTE_COLUMNS})
+
+    def _control_changes(self, start: int, count: int) -> List[MidiCC]:
+        rows = self.control_changes[start:start + count]
+        return [
+            MidiCC(controller=controller, value=value, position=position, channel=channel)
+            for controller, value, position, channel in zip(
+                rows['controller'].tolist(), rows['value'].tolist(),
+                rows['position'].tolist(), rows['channel'].tolist()
+            )
+        ]
+
+    def _points(self, start: int, count: int) -> List[AutomationPoint]:
+        rows = self.points[start:start + count]
+        return [
+            AutomationPoint(value=value, position=position, curve=curve)
+            for value, position, curve in zip(
+                rows['value'].tolist(), rows['position'].tolist(), rows['curve'].tolist()
+            )
+        ]
+
+    def deserialize_clips(self, clips: Dict[str, Any]) -> List[SessionClip]:
+        """Convert one instrument's directory entries to SessionClip objects"""
+        return [
+            SessionClip(
+                name=clip["name"],
+                pattern=MidiPattern(
+                    name=clip["name"],
+                    length_bars=clip["length_bars"],
+                    notes=self.note_array(*clip["notes"]),
+                    time_signature_numerator=clip.get("time_signature", DEFAULT_TIME_SIGNATURE)[0],
+                    time_signature_denominator=clip.get("time_signature", DEFAULT_TIME_SIGNATURE)[1],
+                    **{name: clip.get(name, 0.0) for name in PERFORMANCE_FIELDS},
+                    control_changes=self._control_changes(*clip["control_changes"]),
+                    automations=[
+                        AutomationEnvelope(
+                            parameter_name=automation["parameter_name"],
+                            points=self._points(*automation["points"]),
+                            loop_start=automation.get("loop_start"),
+                            loop_end=automation.get("loop_end")
+                        )
+                        for automation in clip["automations"]
+                    ]
+                ),
+                slot_index=clip["slot_index"],
+                scene_index=clip["scene_index"],
+                color=clip.get("color")
+            )
+            for clip in clips["clips"]
+        ]
+
+class _TableBuilder:
+    """Collects rows of one table as columns, handing out (start, count) ranges"""
+
+    def __init__(self, dtype: np.dtype):
+        self.dtype = dtype
+        self.columns: Dict[str, List[Any]] = {
+            name: [] for name in dtype.names if name != 'padding'
+        }
+        self.size = 0
+
+    def add(self, columns: Dict[str, Any]) -> List[int]:
+        start = self.size
+        for name, values in columns.items():
+            self.columns[name].append(np.asarray(values, dtype=self.dtype[name]))
+        self.size += len(next(iter(columns.values())))
+        return [start, self.size - start]
+
+    def build(self) -> np.ndarray:
+        table = np.zeros(self.size, dtype=self.dtype)
+        for name, chunks in self.columns.items():
+            if chunks:
+                table[name] = np.concatenate(chunks)
+        return table
+
+def write_binary_patterns(data: Dict[str, Any], path: Union[str, Path]) -> Path:
+    """Write pattern library data, as found in the JSON files, in binary form"""
+    path = Path(path)
+    notes = _TableBuilder(NOTE_RECORD)
+    control_changes = _TableBuilder(CC_RECORD)
+    points = _TableBuilder(POINT_RECORD)
+
+    instruments = {}
+    for instrument, section in data["patterns"].items():
+        entries = []
+        for clip in section["clips"]:
+            clip_notes = NoteArray.from_records(clip.get("notes", []))
+            clip_ccs = sorted(clip.get("control_changes", []), key=lambda cc: cc["position"])
+            entry = {
+                key: value for key, value in clip.items()
+                if key not in ("notes", "control_changes", "automations")
+            }
+            entry["notes"] = notes.add({name: clip_notes.column(name) for name in NOTE_COLUMNS})
+            entry["control_changes"] = control_changes.add({
+                name: [cc.get(name, 0) for cc in clip_ccs]
+                for name in ('position', 'controller', 'value', 'channel')
+            })
+            entry["automations"] = [
+                {
+                    "parameter_name": automation["parameter_name"],
+                    "loop_start": automation.get("loop_start"),
+                    "loop_end": automation.get("loop_end"),
+                    "points": points.add({
+                        name: [point.get(name, 0.0) for point in automation["points"]]
+                        for name in ('position', 'value', 'curve')
+                    })
+                }
+                for automation in clip.get("automations", [])
+            ]
+            entries.append(entry)
+        instruments[instrument] = {"clips": entries}
+
+    directory = json.dumps(instruments, separators=(',', ':')).encode('utf-8')
+    tables = [notes.build(), control_changes.build(), points.build()]
+    layout = []
+    offset = HEADER.size + len(directory)
+    for table in tables:
+        offset = _aligned(offset)
+        layout.extend([len(table), offset])
+        offset += table.nbytes
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(directory), *layout)
+
+    # Replace atomically: readers may still have the previous file mapped
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-', suffix=SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(directory)
+            for table, table_offset in zip(tables, layout[1::2]):
+                f.write(b"\0" * (table_offset - f.tell()))
+                f.write(table.tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+def convert_json_to_binary(json_path: Union[str, Path],
+                           binary_path: Optional[Union[str, Path]] = None) -> Path:
+    """Convert a JSON pattern library, by default next to it with the binary suffix"""
+    json_path = Path(json_path)
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    return write_binary_patterns(data, binary_path or json_path.with_suffix(SUFFIX))
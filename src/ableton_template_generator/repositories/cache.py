@@ -0,0 +1,117 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+@dataclass
+class CacheStats:
+    """Counters describing the behaviour of a FileCache"""
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0   # File touched but content unchanged, counted as a hit
+    invalidations: int = 0   # Entry reloaded because the file content changed
+    evictions: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+@dataclass
+class _Entry:
+    signature: Tuple[int, int]   # (mtime_ns, size) of the file when loaded
+    digest: str                  # Hash of the file content
+    value: Any
+
+def content_hash(data: bytes) -> str:
+    """Hash of file content used to detect changes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class FileCache:
+    """Bounded LRU cache of values loaded from files.
+
+    An entry is reused while the file's mtime and size are unchanged. If they
+    changed, the file is re-read and hashed, and the value is only rebuilt
+    when the content hash differs.
+
+    With ``read_content=False`` the loader is given the file's path instead
+    of its content, for files it maps or streams itself. Entries are then
+    validated by mtime and size alone.
+    """
+
+    def __init__(self, loader: Callable[[Any], Any], maxsize: int = 32,
+                 read_content: bool = True):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.read_content = read_content
+        self._entries: 'OrderedDict[Path, _Entry]' = OrderedDict()
+        self._stats = CacheStats(maxsize=maxsize)
+        self._lock = threading.RLock()
+
+    def get(self, path: Path) -> Any:
+        """Get the value for a file, loading it if needed"""
+        return self._lookup(path).value
+
+    def get_hash(self, path: Path) -> str:
+        """Get the content hash of a file, loading it if needed"""
+        return self._lookup(path).digest
+
+    def get_with_hash(self, path: Path) -> Tuple[Any, str]:
+        """Get the value for a file and the hash of the content it was loaded from"""
+        entry = self._lookup(path)
+        return entry.value, entry.digest
+
+    def _lookup(self, path: Path) -> _Entry:
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(path)
+                self._stats.hits += 1
+                return entry
+
+            if self.read_content:
+                data = path.read_bytes()
+                digest = content_hash(data)
+            else:
+                data = path
+                digest = "{}-{}".format(*signature)
+            if entry is not None and entry.digest == digest:
+                entry.signature = signature
+                self._entries.move_to_end(path)
+                self._stats.hits += 1
+                self._stats.revalidations += 1
+                return entry
+
+            if entry is not None:
+                self._stats.invalidations += 1
+            self._stats.misses += 1
+            entry = _Entry(signature=signature, digest=digest, value=self.loader(data))
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+            return entry
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Drop one entry, or every entry if no path is given"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def stats(self) -> CacheStats:
+        """Get a snapshot of the cache counters"""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                revalidations=self._stats.revalidations,
+                invalidations=self._stats.invalidations,
+                evictions=self._stats.evictions,
+                size=len(self._entries),
+                maxsize=self.maxsize
+            )
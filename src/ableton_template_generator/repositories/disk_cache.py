@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs without the inter-process lock
+    fcntl = None
+
+# Temporary files older than this are left over from writes that never
+# finished (e.g. a killed process) and are removed by evict()
+STALE_TEMP_SECONDS = 3600
+
+def default_cache_dir() -> Path:
+    """Per-user cache directory for the template generator"""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / ".cache"
+    return Path(base) / "ableton_template_generator"
+
+class DiskCache:
+    """Key/value store of JSON documents or raw bytes in a directory.
+
+    Safe to share between processes on one host: entries are written to a
+    temporary file and atomically renamed into place, so readers only ever
+    see complete entries, and eviction runs under an exclusive lock file.
+    Entries are evicted least recently used first once the directory grows
+    beyond ``max_bytes``, and expire after ``ttl_seconds`` if given.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    def _entry_path(self, key: str, suffix: str = '.json') -> Path:
+        return self.cache_dir / f"{key}{suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # Missing, or removed/replaced by another process mid-read
+            return None
+
+        # Entries not written by put() are misses, not errors
+        if (not isinstance(entry, dict) or 'value' not in entry
+                or not isinstance(entry.get('created'), (int, float))):
+            return None
+        if not self._fresh(path, entry['created']):
+            return None
+        return entry['value']
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Get cached bytes, or None if missing or expired"""
+        path = self._entry_path(key, '.bin')
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        # Raw entries start with their creation time on a line of its own
+        created, _, value = data.partition(b"\n")
+        try:
+            created = float(created)
+        except ValueError:
+            return None
+        if not self._fresh(path, created):
+            return None
+        return value
+
+    def put(self, key: str, value: Any, evict: bool = True) -> None:
+        """Store a value, then evict old entries if over the size limit"""
+        data = json.dumps({'created': time.time(), 'value': value}, separators=(',', ':'))
+        self._store(self._entry_path(key), data.encode('utf-8'))
+        if evict:
+            self.evict()
+
+    def put_bytes(self, key: str, value: bytes, evict: bool = True) -> None:
+        """Store bytes, then evict old entries if over the size limit.
+
+        Pass ``evict=False`` when storing many entries in a row, and call
+        evict() once afterwards.
+        """
+        self._store(self._entry_path(key, '.bin'), repr(time.time()).encode('ascii') + b"\n" + value)
+        if evict:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        """Remove one entry"""
+        self._remove(self._entry_path(key))
+        self._remove(self._entry_path(key, '.bin'))
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._locked():
+            for path, _ in list(self._entries()):
+                self._remove(path)
+
+    def size_bytes(self) -> int:
+        """Total size of the cached entries"""
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self) -> int:
+        """Evict least recently used entries until under the size limit.
+
+        Temporary files of interrupted writes are removed too, once they are
+        STALE_TEMP_SECONDS old.
+        """
+        removed = 0
+        with self._locked():
+            for path in self._stale_temp_files():
+                self._remove(path)
+                removed += 1
+            entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+            total = sum(stat.st_size for _, stat in entries)
+            for path, stat in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= stat.st_size
+                removed += 1
+        return removed
+
+    def _fresh(self, path: Path, created: float) -> bool:
+        """Drop an expired entry, or mark it as recently used for eviction"""
+        if self.ttl_seconds is not None and time.time() - created > self.ttl_seconds:
+            self._remove(path)
+            return False
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True
+
+    def _store(self, path: Path, data: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-', suffix=path.suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(Path(temp_path))
+            raise
+
+    def _entries(self) -> Iterator:
+        for path in self.cache_dir.iterdir():
+            if path.suffix not in ('.json', '.bin') or path.name.startswith('.tmp-'):
+                continue
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:
+                continue
+
+    def _stale_temp_files(self) -> Iterator[Path]:
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for path in self.cache_dir.glob('.tmp-*'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    yield path
+            except FileNotFoundError:
+                continue
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.cache_dir / ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
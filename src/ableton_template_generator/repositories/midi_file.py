@@ -0,0 +1,236 @@
+"""Standard MIDI File (SMF) reading and writing for MidiPattern.
+
+Reading merges every track of a format 0 or 1 file into one pattern: note
+on/off pairs become notes, controller messages become MidiCC events and
+the first time signature sets the pattern's meter. Positions are in beats
+(quarter notes). Other events are skipped.
+
+Writing produces a format 0 file with the pattern's notes, control changes
+and time signature. The track ends at the pattern's length: notes are cut
+there, and notes and control changes after it are dropped. Note probability
+has no SMF equivalent and is dropped too. Reading takes the pattern's length
+from the end of track event, rounded up to whole bars.
+"""
+
+import math
+import struct
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from ..models.midi_pattern import MidiPattern, MidiCC, NoteArray
+
+DEFAULT_TICKS_PER_BEAT = 480
+
+_NOTE_OFF = 0x80
+_NOTE_ON = 0x90
+_CONTROL_CHANGE = 0xB0
+_PROGRAM_CHANGE = 0xC0
+_CHANNEL_PRESSURE = 0xD0
+_META = 0xFF
+_META_TRACK_NAME = 0x03
+_META_TIME_SIGNATURE = 0x58
+_META_END_OF_TRACK = 0x2F
+
+def _read_varlen(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+def _write_varlen(value: int) -> bytes:
+    buffer = [value & 0x7F]
+    value >>= 7
+    while value:
+        buffer.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(buffer))
+
+class _TrackEvents:
+    """Notes and control changes collected from all tracks of a file"""
+
+    def __init__(self):
+        # note on order, start tick, length in ticks, pitch, velocity, channel
+        self.notes: List[Tuple[int, int, int, int, int, int]] = []
+        # tick, controller, value, channel
+        self.control_changes: List[Tuple[int, int, int, int]] = []
+        self.time_signature = None
+        self.track_name = None
+        self.end_tick = 0
+        self._note_ons = 0
+
+    def read_track(self, data: bytes, pos: int, end: int) -> None:
+        tick = 0
+        status = 0
+        open_notes: Dict[Tuple[int, int], deque] = {}
+        while pos < end:
+            delta, pos = _read_varlen(data, pos)
+            tick += delta
+            byte = data[pos]
+
+            if byte == _META:
+                meta_type = data[pos + 1]
+                length, pos = _read_varlen(data, pos + 2)
+                payload = data[pos:pos + length]
+                pos += length
+                if meta_type == _META_END_OF_TRACK:
+                    break
+                if meta_type == _META_TIME_SIGNATURE and length >= 2 and self.time_signature is None:
+                    self.time_signature = (payload[0], 2 ** payload[1])
+                elif meta_type == _META_TRACK_NAME and self.track_name is None:
+                    self.track_name = payload.decode('latin-1')
+                continue
+            if byte in (0xF0, 0xF7):  # System exclusive
+                length, pos = _read_varlen(data, pos + 1)
+                pos += length
+                continue
+
+            if byte & 0x80:
+                status = byte
+                pos += 1
+            elif not status:
+                raise ValueError("Running status without a preceding status byte")
+
+            kind = status & 0xF0
+            channel = status & 0x0F
+            if kind in (_PROGRAM_CHANGE, _CHANNEL_PRESSURE):
+                pos += 1
+                continue
+            data1 = data[pos]
+            data2 = data[pos + 1]
+            pos += 2
+
+            if kind == _NOTE_ON and data2:
+                open_notes.setdefault((channel, data1), deque()).append((self._note_ons, tick, data2))
+                self._note_ons += 1
+            elif kind == _NOTE_OFF or kind == _NOTE_ON:
+                starts = open_notes.get((channel, data1))
+                if starts:
+                    # Overlapping notes of one pitch end first in, first out
+                    order, start, velocity = starts.popleft()
+                    self.notes.append((order, start, tick - start, data1, velocity, channel))
+            elif kind == _CONTROL_CHANGE:
+                self.control_changes.append((tick, data1, data2, channel))
+
+        # Notes still sounding end with the track
+        for (channel, pitch), starts in open_notes.items():
+            for order, start, velocity in starts:
+                self.notes.append((order, start, tick - start, pitch, velocity, channel))
+        self.end_tick = max(self.end_tick, tick)
+
+def parse_midi(data: bytes, name: str = "") -> MidiPattern:
+    """Build a pattern from the content of a Standard MIDI File"""
+    if data[:4] != b"MThd" or len(data) < 14:
+        raise ValueError("Not a Standard MIDI File")
+    header_length, = struct.unpack_from(">I", data, 4)
+    _, track_count, division = struct.unpack_from(">HHH", data, 8)
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+
+    events = _TrackEvents()
+    pos = 8 + header_length
+    tracks = 0
+    try:
+        while pos + 8 <= len(data) and tracks < track_count:
+            chunk_type = data[pos:pos + 4]
+            length, = struct.unpack_from(">I", data, pos + 4)
+            pos += 8
+            if chunk_type == b"MTrk":
+                events.read_track(data, pos, min(pos + length, len(data)))
+                tracks += 1
+            pos += length
+    except IndexError:
+        raise ValueError("Truncated MIDI track")
+
+    numerator, denominator = events.time_signature or (4, 4)
+    if events.notes:
+        # Notes starting together keep the order of their note ons
+        _, start, length, pitch, velocity, channel = zip(*sorted(events.notes))
+        notes = NoteArray(
+            pitch=pitch,
+            velocity=velocity,
+            position=np.array(start) / division,
+            # Zero-length notes are kept, one tick long
+            duration=np.maximum(length, 1) / division,
+            channel=channel
+        )
+    else:
+        notes = NoteArray()
+    control_changes = [
+        MidiCC(controller=controller, value=value, position=tick / division, channel=channel)
+        for tick, controller, value, channel in events.control_changes
+    ]
+
+    # Every event is before the end of track, so it alone gives the length
+    end_beats = events.end_tick / division
+    beats_per_bar = numerator * 4 / denominator
+    return MidiPattern(
+        name=name or events.track_name or "",
+        length_bars=max(1, math.ceil(end_beats / beats_per_bar - 1e-9)),
+        notes=notes,
+        time_signature_numerator=numerator,
+        time_signature_denominator=denominator,
+        control_changes=control_changes
+    )
+
+def read_midi_file(path: Union[str, Path]) -> MidiPattern:
+    """Read a Standard MIDI File, naming the pattern after the file"""
+    path = Path(path)
+    return parse_midi(path.read_bytes(), path.stem)
+
+def encode_midi(pattern: MidiPattern, ticks_per_beat: int = DEFAULT_TICKS_PER_BEAT) -> bytes:
+    """Encode a pattern as a format 0 Standard MIDI File"""
+    notes = pattern.notes
+    end_tick = round(pattern.get_duration_beats() * 4 / pattern.time_signature_denominator
+                     * ticks_per_beat)
+    starts = np.round(notes.position * ticks_per_beat).astype(np.int64)
+    ends = np.maximum(np.round((notes.position + notes.duration) * ticks_per_beat).astype(np.int64),
+                      starts + 1)
+    # A note off after the end of track would make the pattern longer on import
+    inside = starts < end_tick
+    starts = starts[inside]
+    ends = np.minimum(ends[inside], end_tick)
+
+    # (tick, order, message); at equal ticks note offs go first, then
+    # control changes, then note ons
+    events = []
+    for start, end, pitch, velocity, channel in zip(
+        starts.tolist(), ends.tolist(), notes.pitch[inside].tolist(),
+        notes.velocity[inside].tolist(), notes.channel[inside].tolist()
+    ):
+        events.append((start, 2, bytes((_NOTE_ON | channel, pitch, max(velocity, 1)))))
+        events.append((end, 0, bytes((_NOTE_OFF | channel, pitch, 0))))
+    for cc in pattern.control_changes:
+        tick = round(cc.position * ticks_per_beat)
+        if tick <= end_tick:
+            events.append((tick, 1, bytes((_CONTROL_CHANGE | cc.channel, cc.controller, cc.value))))
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    track = bytearray()
+    if pattern.name:
+        name = pattern.name.encode('latin-1', 'replace')
+        track += b"\x00" + bytes((_META, _META_TRACK_NAME)) + _write_varlen(len(name)) + name
+    track += b"\x00" + bytes((
+        _META, _META_TIME_SIGNATURE, 4,
+        pattern.time_signature_numerator,
+        pattern.time_signature_denominator.bit_length() - 1,
+        24, 8
+    ))
+    tick = 0
+    for event_tick, _, message in events:
+        track += _write_varlen(event_tick - tick) + message
+        tick = event_tick
+    track += _write_varlen(end_tick - tick) + bytes((_META, _META_END_OF_TRACK, 0))
+
+    header = b"MThd" + struct.pack(">IHHH", 6, 0, 1, ticks_per_beat)
+    return header + b"MTrk" + struct.pack(">I", len(track)) + bytes(track)
+
+def write_midi_file(pattern: MidiPattern, path: Union[str, Path],
+                    ticks_per_beat: int = DEFAULT_TICKS_PER_BEAT) -> None:
+    """Write a pattern as a format 0 Standard MIDI File"""
+    Path(path).write_bytes(encode_midi(pattern, ticks_per_beat))
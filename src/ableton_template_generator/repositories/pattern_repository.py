@@ -1,39 +1,235 @@
 
 import json
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List
-from ..models.midi_pattern import MidiPattern, SessionClip
+from typing import Any, Callable, Dict, List, Optional
+from ..config.loader import get_setting
+from ..models.midi_pattern import (
+    MidiPattern,
+    MidiCC,
+    NoteArray,
+    SessionClip,
+    AutomationEnvelope,
+    AutomationPoint
+)
+from .cache import FileCache, CacheStats
+from .binary_patterns import (
+    BinaryPatternFile,
+    convert_json_to_binary,
+    write_binary_patterns,
+    DEFAULT_TIME_SIGNATURE,
+    PERFORMANCE_FIELDS,
+    SUFFIX as BINARY_SUFFIX
+)
+
+class _PatternLibrary:
+    """Parsed pattern file whose instruments are deserialized on first use"""
+
+    def __init__(self, raw_patterns: Dict[str, Any],
+                 deserialize: Callable[[Any], List[SessionClip]]):
+        self.raw_patterns = raw_patterns
+        self.deserialize = deserialize
+        self.clips: Dict[str, List[SessionClip]] = {}
 
 class PatternRepository:
-    def __init__(self, patterns_dir: str = "patterns"):
+    def __init__(self, patterns_dir: Optional[str] = None, cache_size: int = 16):
+        if patterns_dir is None:
+            patterns_dir = get_setting('paths', 'patterns', default="patterns")
         self.patterns_dir = Path(patterns_dir)
+        # Parsed genre files, evicted least recently used first
+        self._cache = FileCache(self._parse_json, maxsize=cache_size)
+        # Binary files are memory-mapped rather than read
+        self._binary_cache = FileCache(self._map_binary, maxsize=cache_size, read_content=False)
+
+    def pattern_path(self, genre: str) -> Path:
+        """Get the path of the pattern file for a genre.
+
+        The binary file is used when it exists and is not older than the
+        JSON file, so a converted library is picked up automatically and an
+        edited JSON file takes over from a stale conversion.
+        """
+        json_path = self.json_path(genre)
+        binary_path = self.binary_path(genre)
+        try:
+            binary_mtime = binary_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return json_path
+        try:
+            if json_path.stat().st_mtime_ns > binary_mtime:
+                return json_path
+        except FileNotFoundError:
+            pass
+        return binary_path
+
+    def json_path(self, genre: str) -> Path:
+        """Get the path of the JSON pattern file for a genre"""
+        return self.patterns_dir / f"{genre}_patterns.json"
+
+    def binary_path(self, genre: str) -> Path:
+        """Get the path of the binary pattern file for a genre"""
+        return self.patterns_dir / f"{genre}_patterns{BINARY_SUFFIX}"
 
     def load_patterns(self, genre: str) -> Dict[str, List[SessionClip]]:
         """Load MIDI patterns for a specific genre"""
-        pattern_file = self.patterns_dir / f"{genre}_patterns.json"
-        if not pattern_file.exists():
+        library = self._load_library(genre)
+        return {
+            instrument: self._get_clips(library, instrument)
+            for instrument in library.raw_patterns
+        }
+
+    def load_instrument_patterns(self, genre: str, instrument: str) -> List[SessionClip]:
+        """Load the MIDI patterns of one instrument, deserializing only that instrument"""
+        library = self._load_library(genre)
+        if instrument not in library.raw_patterns:
+            return []
+        return self._get_clips(library, instrument)
+
+    def get_instruments(self, genre: str) -> List[str]:
+        """Get the instruments that have patterns for a genre"""
+        return list(self._load_library(genre).raw_patterns)
+
+    def get_genres(self) -> List[str]:
+        """Get the genres that have a JSON pattern file"""
+        return sorted(path.name[:-len("_patterns.json")] for path in self.patterns_dir.glob("*_patterns.json"))
+
+    def convert_to_binary(self, genre: str) -> Path:
+        """Write the binary pattern file of a genre from its JSON file"""
+        json_path = self.json_path(genre)
+        if not json_path.exists():
+            raise ValueError(f"No patterns found for genre: {genre}")
+        return convert_json_to_binary(json_path, self.binary_path(genre))
+
+    def save_patterns(self, genre: str, patterns: Dict[str, List[SessionClip]]) -> Path:
+        """Save the MIDI patterns of a genre as its JSON pattern file"""
+        return self.save_library(genre, self.serialize(patterns))
+
+    def save_library(self, genre: str, data: Dict[str, Any], binary: bool = False) -> Path:
+        """Save pattern library data in its JSON representation, and optionally in binary"""
+        json_path = self.json_path(genre)
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, 'w') as f:
+            json.dump(data, f)
+        self._cache.invalidate(json_path)
+        if binary:
+            write_binary_patterns(data, self.binary_path(genre))
+            self._binary_cache.invalidate(self.binary_path(genre))
+        return json_path
+
+    def serialize(self, patterns: Dict[str, List[SessionClip]]) -> Dict[str, Any]:
+        """Convert patterns to their JSON representation"""
+        return {
+            "patterns": {
+                instrument: {"clips": [self.serialize_clip(clip) for clip in clips]}
+                for instrument, clips in patterns.items()
+            }
+        }
+
+    @staticmethod
+    def serialize_clip(clip: SessionClip) -> Dict[str, Any]:
+        """Convert one clip to its JSON representation"""
+        pattern = clip.pattern
+        data = {
+            "name": clip.name,
+            "length_bars": pattern.length_bars,
+            "slot_index": clip.slot_index,
+            "scene_index": clip.scene_index,
+            "color": clip.color,
+            "time_signature": [pattern.time_signature_numerator, pattern.time_signature_denominator],
+            "notes": pattern.notes.to_records(),
+            "control_changes": [asdict(cc) for cc in pattern.control_changes],
+            "automations": [asdict(automation) for automation in pattern.automations]
+        }
+        # Performance settings are only written when set
+        for name in PERFORMANCE_FIELDS:
+            if getattr(pattern, name):
+                data[name] = getattr(pattern, name)
+        return data
+
+    def cache_info(self) -> CacheStats:
+        """Get pattern file cache statistics"""
+        json_stats = self._cache.stats()
+        binary_stats = self._binary_cache.stats()
+        return CacheStats(**{
+            field: getattr(json_stats, field) + getattr(binary_stats, field)
+            for field in vars(json_stats)
+        })
+
+    def clear_cache(self) -> None:
+        """Drop all cached pattern files"""
+        self._cache.invalidate()
+        self._binary_cache.invalidate()
+
+    def _load_library(self, genre: str) -> _PatternLibrary:
+        path = self.pattern_path(genre)
+        cache = self._binary_cache if path.suffix == BINARY_SUFFIX else self._cache
+        try:
+            return cache.get(path)
+        except FileNotFoundError:
             raise ValueError(f"No patterns found for genre: {genre}")
 
-        with open(pattern_file, 'r') as f:
-            data = json.load(f)
-            return self._deserialize_patterns(data)
+    def _parse_json(self, data: bytes) -> _PatternLibrary:
+        return _PatternLibrary(json.loads(data)["patterns"], self._deserialize_clips)
+
+    def _map_binary(self, path: Path) -> _PatternLibrary:
+        patterns = BinaryPatternFile(path)
+        return _PatternLibrary(patterns.instruments, patterns.deserialize_clips)
+
+    def _get_clips(self, library: _PatternLibrary, instrument: str) -> List[SessionClip]:
+        """Deserialize an instrument once and return copies of its clips"""
+        clips = library.clips.get(instrument)
+        if clips is None:
+            clips = library.deserialize(library.raw_patterns[instrument])
+            clips = library.clips.setdefault(instrument, clips)
+        return [self._copy_clip(clip) for clip in clips]
+
+    def _copy_clip(self, clip: SessionClip) -> SessionClip:
+        """Copy a cached clip so callers cannot alter the cache"""
+        return SessionClip(
+            name=clip.name,
+            pattern=clip.pattern.copy(),
+            slot_index=clip.slot_index,
+            scene_index=clip.scene_index,
+            color=clip.color,
+            launch_quantization=clip.launch_quantization,
+            launch_mode=clip.launch_mode,
+            launch_probability=clip.launch_probability,
+            follow_action=clip.follow_action,
+            follow_action_time=clip.follow_action_time
+        )
 
     def _deserialize_patterns(self, data: Dict) -> Dict[str, List[SessionClip]]:
         """Convert JSON data to SessionClip objects"""
-        patterns = {}
-        for instrument, clips in data["patterns"].items():
-            patterns[instrument] = [
-                SessionClip(
+        return {
+            instrument: self._deserialize_clips(clips)
+            for instrument, clips in data["patterns"].items()
+        }
+
+    def _deserialize_clips(self, clips: Dict) -> List[SessionClip]:
+        """Convert one instrument's JSON clips to SessionClip objects"""
+        return [
+            SessionClip(
+                name=clip["name"],
+                pattern=MidiPattern(
                     name=clip["name"],
-                    pattern=MidiPattern(
-                        name=clip["name"],
-                        length_bars=clip["length_bars"],
-                        notes=[MidiNote(**note) for note in clip["notes"]]
-                    ),
-                    slot_index=clip["slot_index"],
-                    scene_index=clip["scene_index"],
-                    color=clip.get("color")
-                )
-                for clip in clips["clips"]
-            ]
-        return patterns
\ No newline at end of file
+                    length_bars=clip["length_bars"],
+                    notes=NoteArray.from_records(clip["notes"]),
+                    time_signature_numerator=clip.get("time_signature", DEFAULT_TIME_SIGNATURE)[0],
+                    time_signature_denominator=clip.get("time_signature", DEFAULT_TIME_SIGNATURE)[1],
+                    **{name: clip.get(name, 0.0) for name in PERFORMANCE_FIELDS},
+                    control_changes=[MidiCC(**cc) for cc in clip.get("control_changes", [])],
+                    automations=[
+                        AutomationEnvelope(
+                            parameter_name=automation["parameter_name"],
+                            points=[AutomationPoint(**point) for point in automation["points"]],
+                            loop_start=automation.get("loop_start"),
+                            loop_end=automation.get("loop_end")
+                        )
+                        for automation in clip.get("automations", [])
+                    ]
+                ),
+                slot_index=clip["slot_index"],
+                scene_index=clip["scene_index"],
+                color=clip.get("color")
+            )
+            for clip in clips["clips"]
+        ]
@@ -1,31 +1,107 @@
+import copy
 import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from ..config.loader import get_setting
 from ..models.template import Template
 from ..models.group import Group
 from ..models.track import Track, TrackType, ColorCode
 from ..models.timeline import TimelineMarker, MarkerType
+from .cache import FileCache, CacheStats
 
 class TemplateRepository:
-    def __init__(self, templates_dir: str = "templates"):
+    def __init__(self, templates_dir: Optional[str] = None, cache_size: int = 32):
+        if templates_dir is None:
+            templates_dir = get_setting('paths', 'templates', default="templates")
         self.templates_dir = Path(templates_dir).resolve()  # Get absolute path
-        print(f"Template directory: {self.templates_dir}")  # Debug print
         self.templates_dir.mkdir(exist_ok=True)
+        # Deserialized templates, never handed out directly (see load_template)
+        self._cache = FileCache(
+            lambda data: self._deserialize_template(json.loads(data)),
+            maxsize=cache_size
+        )
+
+    def template_path(self, genre: str) -> Path:
+        """Get the path of the template file for a genre"""
+        return self.templates_dir / f"{genre.lower()}.json"
 
     def load_template(self, genre: str) -> Template:
-        template_path = self.templates_dir / f"{genre.lower()}.json"
-        print(f"Looking for template at: {template_path}")  # Debug print
-        if not template_path.exists():
+        """Load a template, returning a private copy of the cached entry"""
+        try:
+            return self.copy_template(self._cache.get(self.template_path(genre)))
+        except FileNotFoundError:
             raise ValueError(f"No template found for genre: {genre}")
 
-        with open(template_path, 'r') as f:
-            data = json.load(f)
-            return self._deserialize_template(data)
+    def load_template_with_hash(self, genre: str) -> Tuple[Template, str]:
+        """Load a template and the content hash of the file it was read from"""
+        template, digest = self.cached_template_with_hash(genre)
+        return self.copy_template(template), digest
+
+    def cached_template_with_hash(self, genre: str) -> Tuple[Template, str]:
+        """The cached template itself, without copying, and its content hash.
+
+        The template is shared with every other caller: it must not be
+        modified. Use copy_template first to change it.
+        """
+        try:
+            return self._cache.get_with_hash(self.template_path(genre))
+        except FileNotFoundError:
+            raise ValueError(f"No template found for genre: {genre}")
+
+    def template_hash(self, genre: str) -> str:
+        """Get the content hash of a genre's template file"""
+        try:
+            return self._cache.get_hash(self.template_path(genre))
+        except FileNotFoundError:
+            raise ValueError(f"No template found for genre: {genre}")
+
+    def cache_info(self) -> CacheStats:
+        """Get template cache statistics"""
+        return self._cache.stats()
+
+    def clear_cache(self) -> None:
+        """Drop all cached templates"""
+        self._cache.invalidate()
 
     def save_template(self, template: Template) -> None:
-        template_path = self.templates_dir / f"{template.genre.lower()}.json"
+        template_path = self.template_path(template.genre)
         with open(template_path, 'w') as f:
             json.dump(self._serialize_template(template), f, indent=2)
+        self._cache.invalidate(template_path)
+
+    def serialize(self, template: Template) -> Dict:
+        """Convert a template to its JSON representation"""
+        return self._serialize_template(template)
+
+    def deserialize(self, data: Dict) -> Template:
+        """Build a template from its JSON representation"""
+        return self._deserialize_template(data)
+
+    def copy_template(self, template: Template) -> Template:
+        """Copy the mutable parts of a template so callers cannot alter the cache"""
+        return Template(
+            genre=template.genre,
+            groups=[self._copy_group(group) for group in template.groups],
+            default_tempo=template.default_tempo,
+            default_duration_minutes=template.default_duration_minutes,
+            timeline_markers=[self._copy_marker(marker) for marker in template.timeline_markers]
+        )
+
+    def _copy_group(self, group: Group) -> Group:
+        return Group(
+            name=group.name,
+            color=group.color,
+            tracks=[copy.copy(track) for track in group.tracks],
+            subgroups=(
+                [self._copy_group(subgroup) for subgroup in group.subgroups]
+                if group.subgroups is not None else None
+            )
+        )
+
+    def _copy_marker(self, marker: TimelineMarker) -> TimelineMarker:
+        marker = copy.copy(marker)
+        marker.metadata = dict(marker.metadata)
+        return marker
 
     def _deserialize_template(self, data: Dict) -> Template:
         timeline_markers = [
@@ -39,25 +115,7 @@ class TemplateRepository:
             for marker in data.get('timeline_markers', [])
         ]
 
-        groups = [
-            Group(
-                name=group['name'],
-                color=ColorCode[group['color']],
-                tracks=[
-                    Track(
-                        name=track['name'],
-                        type=TrackType[track['type']],
-                        color=ColorCode[track['color']],
-                        layers=track.get('layers', 1)
-                    )
-                    for track in group['tracks']
-                ],
-                subgroups=[
-                    Group(**subgroup) for subgroup in group.get('subgroups', [])
-                ]
-            )
-            for group in data['groups']
-        ]
+        groups = [self._deserialize_group(group) for group in data['groups']]
 
         return Template(
             genre=data['genre'],
@@ -67,6 +125,24 @@ class TemplateRepository:
             timeline_markers=timeline_markers
         )
 
+    def _deserialize_group(self, group: Dict) -> Group:
+        return Group(
+            name=group['name'],
+            color=ColorCode[group['color']],
+            tracks=[
+                Track(
+                    name=track['name'],
+                    type=TrackType[track['type']],
+                    color=ColorCode[track['color']],
+                    layers=track.get('layers', 1)
+                )
+                for track in group['tracks']
+            ],
+            subgroups=[
+                self._deserialize_group(subgroup) for subgroup in group.get('subgroups', [])
+            ]
+        )
+
     def _serialize_template(self, template: Template) -> Dict:
         return {
             'genre': template.genre,
@@ -116,5 +192,9 @@ class TemplateRepository:
                     'layers': track.layers
                 }
                 for track in group.tracks
+            ],
+            'subgroups': [
+                self._serialize_group(subgroup)
+                for subgroup in (group.subgroups or [])
             ]
         }
\ No newline at end of file
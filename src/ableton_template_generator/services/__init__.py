@@ -1,9 +1,17 @@
-from .template_service import TemplateService
-from .pattern_service import PatternService
-#from .ai_pattern_generator import AIPatternGenerator
+from ..utils.lazy import lazy_exports
 
 __all__ = [
     'TemplateService',
     'PatternService',
-#    'AIPatternGenerator'
-]
\ No newline at end of file
+    'MidiImportService',
+    'AIPatternGenerator',
+    'GrooveService'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'TemplateService': '.template_service',
+    'PatternService': '.pattern_service',
+    'MidiImportService': '.midi_import_service',
+    'AIPatternGenerator': '.ai_pattern_generator',
+    'GrooveService': '.groove_service'
+})
@@ -0,0 +1,427 @@
+"""AI pattern generation from the ``ai_generation.yml`` settings.
+
+Each instrument of a genre asks the configured model for ``variations``
+patterns, one request per variation. Requests run concurrently on an
+asyncio loop, at most ``max_concurrency`` at a time; the blocking HTTP
+calls themselves run on a thread pool of that size. Failed requests
+(connection errors, timeouts, HTTP 408/429/5xx and unparseable responses)
+are retried with exponential backoff. A call that times out cannot be
+stopped on its thread: it keeps its concurrency slot until it returns.
+
+The model is asked for JSON of the form::
+
+    {"notes": [{"pitch": 36, "velocity": 100, "position": 0.0, "duration": 0.25}]}
+
+with positions and durations in beats from the start of the pattern.
+
+Given a DiskCache, generated patterns are stored under a key of everything
+that shapes the request (see ``pattern_cache_key``) and requests with a
+cached pattern are not sent at all.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from ..config.ai_config import AIConfig, AIModelConfig, AIProvider, get_ai_config
+from ..models.midi_pattern import MidiPattern, NoteArray
+from ..repositories.disk_cache import DiskCache
+
+# Environment variable holding the API key of each provider
+API_KEY_VARIABLES = {
+    AIProvider.ANTHROPIC: 'ANTHROPIC_API_KEY',
+    AIProvider.OPENAI: 'OPENAI_API_KEY',
+    AIProvider.CUSTOM: 'AI_API_KEY',
+}
+ANTHROPIC_VERSION = "2023-06-01"
+
+# HTTP statuses worth retrying; anything else is a permanent failure
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Bump when the cached pattern format or the prompt changes
+CACHE_FORMAT_VERSION = 1
+
+@dataclass(frozen=True)
+class PatternRequest:
+    """One pattern to generate"""
+    genre: str
+    instrument: str
+    complexity: int
+    style_hints: str
+    bars: int
+    variation: int                       # 0-based variation index
+    variations: int = 1                  # Variations requested for the instrument
+
+@dataclass
+class GenerationResult:
+    """Outcome of generating the patterns of a genre"""
+    patterns: Dict[str, List[MidiPattern]] = field(default_factory=dict)  # Instrument -> variations
+    errors: Dict[str, str] = field(default_factory=dict)                  # "<instrument>/<variation>" -> error
+    attempts: int = 0                                                     # HTTP requests sent
+    cached: int = 0                                                       # Patterns taken from the cache
+
+class _RetryableError(Exception):
+    """A failed attempt that may succeed when repeated"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def pattern_cache_key(model_config: AIModelConfig, request: PatternRequest) -> str:
+    """Cache key of a request's pattern: model settings and request fields"""
+    key = json.dumps([
+        CACHE_FORMAT_VERSION,
+        model_config.provider.value,
+        model_config.model_name,
+        model_config.temperature,
+        request.genre,
+        request.instrument,
+        request.complexity,
+        request.style_hints,
+        request.bars,
+        request.variation
+    ])
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+def parse_pattern_response(text: str, request: PatternRequest) -> MidiPattern:
+    """Build a pattern from a model's reply, ignoring text around the JSON"""
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError("Response contains no JSON object")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ValueError(f"Response is not valid JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('notes'), list):
+        raise ValueError("Response has no 'notes' list")
+
+    try:
+        notes = NoteArray.from_records(data['notes'])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed note in response: {e}")
+    # Notes past the end of the pattern would never play
+    notes = notes.filter(notes.position < request.bars * 4)
+    if not notes.validate():
+        raise ValueError("Response contains invalid notes")
+
+    return MidiPattern(
+        name=f"{request.genre} {request.instrument} {request.variation + 1}",
+        length_bars=request.bars,
+        notes=notes,
+        metadata={
+            'genre': request.genre,
+            'instrument': request.instrument,
+            'variation': request.variation,
+            'complexity': request.complexity,
+            'style_hints': request.style_hints,
+            'source': 'ai'
+        }
+    )
+
+class AIPatternGenerator:
+    """Generates patterns for the genres and instruments of an AIConfig
+    (the shared one of the bundled ai_generation.yml by default)"""
+
+    def __init__(self, config: Optional[AIConfig] = None, api_key: Optional[str] = None,
+                 max_concurrency: int = 4, max_retries: int = 3, backoff_seconds: float = 0.5,
+                 cache: Optional[DiskCache] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        config = config if config is not None else get_ai_config()
+        self.config = config
+        self.model_config = config.model_config
+        self.api_key = api_key or os.environ.get(API_KEY_VARIABLES[self.model_config.provider], '')
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.cache = cache
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        # One semaphore per event loop caps every request of the generator at
+        # max_concurrency; asyncio semaphores cannot be shared between loops
+        self._semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def close(self) -> None:
+        """Shut down the HTTP threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __enter__(self) -> 'AIPatternGenerator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def build_requests(self, genre: str, instruments: Optional[List[str]] = None) -> List[PatternRequest]:
+        """List the requests for a genre's instruments, one per variation"""
+        genre_settings = self.config.get_genre_settings(genre)
+        if genre_settings is None:
+            raise ValueError(f"No AI generation settings for genre: {genre}")
+        pattern_settings = self.config.pattern_settings
+        low, high = pattern_settings.complexity_range
+        bars = min(genre_settings.typical_bar_length or pattern_settings.default_bars,
+                   pattern_settings.max_bars)
+
+        pattern_requests = []
+        for instrument, settings in genre_settings.instruments.items():
+            if instrument not in (instruments or genre_settings.instruments):
+                continue
+            variations = min(settings.get('variations', pattern_settings.default_variations),
+                             pattern_settings.max_variations)
+            complexity = min(max(settings.get('complexity', genre_settings.preferred_complexity), low), high)
+            for variation in range(variations):
+                pattern_requests.append(PatternRequest(
+                    genre=genre.lower(),
+                    instrument=instrument,
+                    complexity=complexity,
+                    style_hints=settings.get('style_hints', ''),
+                    bars=bars,
+                    variation=variation,
+                    variations=variations
+                ))
+        return pattern_requests
+
+    def generate(self, genre: str, instruments: Optional[List[str]] = None,
+                 refresh: bool = False) -> GenerationResult:
+        """Generate the patterns of a genre, blocking until all are done.
+
+        Runs its own event loop, so it cannot be called from a running one
+        (e.g. in a notebook): await generate_genre_patterns there instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.generate_genre_patterns(genre, instruments, refresh))
+        raise RuntimeError(
+            "generate() cannot run inside an event loop; await generate_genre_patterns() instead"
+        )
+
+    async def generate_genre_patterns(self, genre: str, instruments: Optional[List[str]] = None,
+                                      refresh: bool = False) -> GenerationResult:
+        """Generate every variation of a genre's instruments concurrently"""
+        return await self.generate_patterns(self.build_requests(genre, instruments), refresh)
+
+    async def generate_patterns(self, pattern_requests: List[PatternRequest],
+                                refresh: bool = False) -> GenerationResult:
+        """Run requests concurrently; failures are reported, not raised.
+
+        Requests with a cached pattern are answered from the cache unless
+        ``refresh`` is set. Newly generated patterns are cached.
+        """
+        outcomes: List[Any] = [
+            None if refresh else self._cached_pattern(request) for request in pattern_requests
+        ]
+        missing = [index for index, outcome in enumerate(outcomes) if outcome is None]
+        result = GenerationResult(cached=len(outcomes) - len(missing))
+
+        generated = await asyncio.gather(
+            *(self._generate_limited(pattern_requests[index], result) for index in missing),
+            return_exceptions=True
+        )
+        for index, outcome in zip(missing, generated):
+            outcomes[index] = outcome
+            if self.cache is not None and isinstance(outcome, MidiPattern):
+                self._cache_pattern(pattern_requests[index], outcome, evict=False)
+        if self.cache is not None and generated:
+            self.cache.evict()
+
+        for request, outcome in zip(pattern_requests, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                result.errors[f"{request.instrument}/{request.variation}"] = str(outcome)
+            else:
+                result.patterns.setdefault(request.instrument, []).append(outcome)
+        return result
+
+    async def generate_pattern(self, request: PatternRequest) -> MidiPattern:
+        """Generate one pattern, retrying transient failures"""
+        pattern = self._cached_pattern(request)
+        if pattern is None:
+            pattern = await self._generate_limited(request)
+            if self.cache is not None:
+                self._cache_pattern(request, pattern)
+        return pattern
+
+    def cached_patterns(self, genre: str, instruments: Optional[List[str]] = None) -> GenerationResult:
+        """Get the cached patterns of a genre without contacting the model"""
+        result = GenerationResult()
+        for request in self.build_requests(genre, instruments):
+            pattern = self._cached_pattern(request)
+            if pattern is None:
+                result.errors[f"{request.instrument}/{request.variation}"] = "Not cached"
+            else:
+                result.patterns.setdefault(request.instrument, []).append(pattern)
+                result.cached += 1
+        return result
+
+    def _cached_pattern(self, request: PatternRequest) -> Optional[MidiPattern]:
+        if self.cache is None:
+            return None
+        data = self.cache.get(pattern_cache_key(self.model_config, request))
+        if data is None:
+            return None
+        return MidiPattern(
+            name=data['name'],
+            length_bars=data['length_bars'],
+            notes=NoteArray.from_records(data['notes']),
+            metadata=data['metadata']
+        )
+
+    def _cache_pattern(self, request: PatternRequest, pattern: MidiPattern, evict: bool = True) -> None:
+        self.cache.put(pattern_cache_key(self.model_config, request), {
+            'name': pattern.name,
+            'length_bars': pattern.length_bars,
+            'notes': pattern.notes.to_records(),
+            'metadata': pattern.metadata
+        }, evict=evict)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """The semaphore of the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _generate_limited(self, request: PatternRequest,
+                                result: Optional[GenerationResult] = None) -> MidiPattern:
+        """Generate one pattern within the concurrency cap, counting attempts in result"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore()
+        timeout = self.model_config.timeout
+        for attempt in range(self.max_retries + 1):
+            await semaphore.acquire()
+            try:
+                future = self._get_executor().submit(self._post, request)
+            except BaseException:
+                semaphore.release()
+                raise
+            # The slot is freed when the HTTP call returns, not when waiting
+            # for it times out: a timed out call still occupies its thread
+            future.add_done_callback(lambda _: _release_threadsafe(loop, semaphore))
+            if result is not None:
+                result.attempts += 1
+            try:
+                text = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                try:
+                    return parse_pattern_response(text, request)
+                except ValueError as e:
+                    # The model may well answer properly next time
+                    raise _RetryableError(str(e))
+            except (_RetryableError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt == self.max_retries:
+                break
+            # Exponential backoff with full jitter, unless the server says otherwise
+            delay = getattr(error, 'retry_after', None)
+            if delay is None:
+                delay = random.uniform(0, self.backoff_seconds * 2 ** attempt)
+            await asyncio.sleep(delay)
+
+        message = str(error) or f"Timed out after {timeout}s"
+        raise ValueError(f"Giving up after {self.max_retries + 1} attempts: {message}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='ai-pattern')
+        return self._executor
+
+    def _session(self) -> requests.Session:
+        # Sessions keep connections alive but are not thread-safe: one per thread
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def prompt(self, request: PatternRequest) -> str:
+        """Describe the wanted pattern to the model"""
+        low, high = self.config.pattern_settings.complexity_range
+        lines = [
+            f"Write a {request.bars}-bar {request.genre} {request.instrument} MIDI pattern in 4/4.",
+            f"Complexity: {request.complexity} on a scale from {low} to {high}.",
+        ]
+        if request.style_hints:
+            lines.append(f"Style: {request.style_hints}.")
+        if request.variations > 1:
+            lines.append(f"This is variation {request.variation + 1} of {request.variations}; "
+                         f"make each variation distinct.")
+        lines.append(
+            'Reply with JSON only: {"notes": [{"pitch": 36, "velocity": 100, '
+            '"position": 0.0, "duration": 0.25}]}. Positions and durations are in beats '
+            f"from the start of the pattern; positions are below {request.bars * 4}."
+        )
+        return "\n".join(lines)
+
+    def _payload(self, request: PatternRequest) -> Dict[str, Any]:
+        model = self.model_config
+        payload = {
+            'model': model.model_name,
+            'max_tokens': model.max_tokens,
+            'temperature': model.temperature,
+        }
+        if model.provider == AIProvider.CUSTOM:
+            payload['prompt'] = self.prompt(request)
+        else:
+            payload['messages'] = [{'role': 'user', 'content': self.prompt(request)}]
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        provider = self.model_config.provider
+        if provider == AIProvider.ANTHROPIC:
+            return {'x-api-key': self.api_key, 'anthropic-version': ANTHROPIC_VERSION}
+        return {'Authorization': f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def _post(self, request: PatternRequest) -> str:
+        """Send one request and return the text of the reply (runs on a worker thread)"""
+        model = self.model_config
+        try:
+            response = self._session().post(
+                model.api_url,
+                json=self._payload(request),
+                headers=self._headers(),
+                timeout=model.timeout
+            )
+        except requests.RequestException as e:
+            raise _RetryableError(f"{type(e).__name__}: {e}")
+
+        if response.status_code in RETRY_STATUSES:
+            try:
+                retry_after = float(response.headers['Retry-After'])
+            except (KeyError, ValueError):
+                retry_after = None
+            raise _RetryableError(f"HTTP {response.status_code} from {model.api_url}", retry_after)
+        if response.status_code >= 400:
+            raise ValueError(f"HTTP {response.status_code} from {model.api_url}: {response.text[:200]}")
+
+        try:
+            body = response.json()
+            if model.provider == AIProvider.ANTHROPIC:
+                return "".join(block.get('text', '') for block in body['content'])
+            if model.provider == AIProvider.OPENAI:
+                return body['choices'][0]['message']['content']
+            # Custom providers may answer with the pattern itself
+            return body['text'] if 'text' in body else json.dumps(body)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise _RetryableError(f"Unexpected response from {model.api_url}: {e}")
+
+def _release_threadsafe(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+    """Release an asyncio semaphore from any thread"""
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # The loop is closed, and its semaphore with it
+        pass
@@ -0,0 +1,173 @@
+"""Local stand-in for the AI providers, for running pattern generation offline.
+
+Answers Anthropic (``/v1/messages``), OpenAI (``/v1/chat/completions``) and
+custom (any other path, ``{"prompt": ...}``) requests with a pattern built
+from the prompt: the same prompt always gets the same pattern. Latency and
+failures can be injected to exercise timeouts and retries.
+
+    python -m ableton_template_generator.services.ai_stub_server --port 8765
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+import click
+
+DEFAULT_PORT = 8765
+
+def stub_pattern(prompt: str) -> Dict[str, Any]:
+    """Pattern notes for a prompt, seeded by its content"""
+    bars = re.search(r"(\d+)-bar", prompt)
+    complexity = re.search(r"Complexity: (\d+)", prompt)
+    bars = int(bars.group(1)) if bars else 2
+    complexity = int(complexity.group(1)) if complexity else 3
+
+    rng = random.Random(hashlib.blake2b(prompt.encode('utf-8'), digest_size=8).digest())
+    root = rng.randrange(36, 61)
+    density = 0.15 + 0.15 * complexity
+    notes = []
+    for step in range(bars * 16):
+        # Downbeats always play, other sixteenths by density
+        if step % 4 == 0 or rng.random() < density:
+            notes.append({
+                'pitch': root + rng.choice((0, 0, 7, 12)),
+                'velocity': rng.randrange(70, 128) if step % 4 == 0 else rng.randrange(40, 100),
+                'position': step * 0.25,
+                'duration': 0.25
+            })
+    return {'notes': notes}
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: 'StubProviderServer'
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': 'invalid JSON'})
+            return
+
+        delay, status = self.server.next_response()
+        if delay:
+            time.sleep(delay)
+        if status != 200:
+            self._reply(status, {'error': 'injected failure'}, {'Retry-After': '0'})
+            return
+
+        if 'messages' in body:
+            prompt = "\n".join(str(message.get('content', '')) for message in body['messages'])
+        else:
+            prompt = str(body.get('prompt', ''))
+        text = "```json\n" + json.dumps(stub_pattern(prompt)) + "\n```"
+
+        if self.path.endswith('/chat/completions'):
+            reply = {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}}]}
+        elif 'messages' in body:
+            reply = {'type': 'message', 'role': 'assistant', 'content': [{'type': 'text', 'text': text}]}
+        else:
+            reply = {'text': text}
+        self._reply(200, reply)
+
+    def _reply(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            # The client gave up waiting, as clients under test of timeouts do
+            pass
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class StubProviderServer(ThreadingHTTPServer):
+    """Threaded stub provider; use as a context manager to serve in the background"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 failure_rate: float = 0.0, fail_first: int = 0, seed: int = 0,
+                 verbose: bool = False):
+        super().__init__((host, port), _StubHandler)
+        self.latency = latency              # Seconds to wait before each reply
+        self.failure_rate = failure_rate    # Fraction of requests answered with HTTP 503
+        self.fail_first = fail_first        # Requests answered with HTTP 503 before any succeeds
+        self.verbose = verbose
+        self.request_count = 0
+        self.failure_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, provider: str = 'anthropic') -> str:
+        """API URL to configure for a provider"""
+        paths = {'anthropic': '/v1/messages', 'openai': '/v1/chat/completions'}
+        return self.base_url + paths.get(provider, '/generate')
+
+    def next_response(self) -> Tuple[float, int]:
+        """Delay and HTTP status of the next reply"""
+        with self._lock:
+            self.request_count += 1
+            fail = self.request_count <= self.fail_first or self._random.random() < self.failure_rate
+            if fail:
+                self.failure_count += 1
+        return self.latency, 503 if fail else 200
+
+    def start(self) -> 'StubProviderServer':
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> 'StubProviderServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=int, default=DEFAULT_PORT, show_default=True)
+@click.option('--latency', type=float, default=0.0, show_default=True,
+              help='Seconds to wait before each reply')
+@click.option('--failure-rate', type=float, default=0.0, show_default=True,
+              help='Fraction of requests answered with HTTP 503')
+def main(host: str, port: int, latency: float, failure_rate: float):
+    """Serve stub AI provider endpoints"""
+    server = StubProviderServer(host, port, latency=latency, failure_rate=failure_rate, verbose=True)
+    click.echo(f"Stub provider listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..models.groove import Groove
+from ..models.midi_pattern import MidiPattern, SessionClip
+from ..repositories.pattern_repository import PatternRepository
+from ..repositories.disk_cache import DiskCache
+
+# Bump when extraction changes, to retire grooves cached on disk
+GROOVE_FORMAT_VERSION = 1
+
+def groove_key(pattern: MidiPattern, resolution: float) -> str:
+    """Cache key of a pattern's groove: its timing, velocities, meter and the grid"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((
+        GROOVE_FORMAT_VERSION, resolution,
+        pattern.time_signature_numerator, pattern.time_signature_denominator
+    )).encode('utf-8'))
+    digest.update(np.ascontiguousarray(pattern.notes.position).tobytes())
+    digest.update(np.ascontiguousarray(pattern.notes.velocity).tobytes())
+    return digest.hexdigest()
+
+class GrooveService:
+    """Extracts grooves from patterns and applies them to others.
+
+    Extracted grooves are kept in a bounded in-memory LRU and, given a
+    DiskCache, on disk, keyed by the content of the source pattern (see
+    ``groove_key``), so a groove is extracted once per pattern and grid.
+    """
+
+    def __init__(self, pattern_repository: PatternRepository,
+                 disk_cache: Optional[DiskCache] = None, maxsize: int = 256):
+        self.pattern_repository = pattern_repository
+        self.disk_cache = disk_cache
+        self.maxsize = maxsize
+        self._grooves: 'OrderedDict[str, Groove]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extract(self, pattern: MidiPattern, resolution: float = 0.25) -> Groove:
+        """Get the groove of a pattern, extracting it if not cached"""
+        key = groove_key(pattern, resolution)
+        with self._lock:
+            groove = self._grooves.get(key)
+            if groove is not None:
+                self._grooves.move_to_end(key)
+                return groove
+
+        data = self.disk_cache.get(key) if self.disk_cache is not None else None
+        if data is not None:
+            groove = Groove.from_dict(data)
+        else:
+            groove = Groove.extract(pattern, resolution)
+            if self.disk_cache is not None:
+                self.disk_cache.put(key, groove.to_dict())
+
+        with self._lock:
+            self._grooves[key] = groove
+            while len(self._grooves) > self.maxsize:
+                self._grooves.popitem(last=False)
+        return groove
+
+    def get_groove(self, genre: str, instrument: str, clip_index: int = 0,
+                   resolution: float = 0.25) -> Groove:
+        """Get the groove of one clip of a genre's pattern library"""
+        clips = self.pattern_repository.load_instrument_patterns(genre, instrument)
+        if not 0 <= clip_index < len(clips):
+            raise ValueError(f"No clip {clip_index} for {instrument} in genre: {genre}")
+        groove = self.extract(clips[clip_index].pattern, resolution)
+        return replace(groove, name=f"{genre} {instrument} {clips[clip_index].name}")
+
+    def apply(self, groove: Groove, patterns: Iterable[MidiPattern],
+              amount: float = 1.0) -> List[MidiPattern]:
+        """Copies of patterns with a groove applied, one vectorized pass per pattern"""
+        return [
+            replace(
+                pattern,
+                notes=groove.apply(pattern.notes, amount),
+                control_changes=list(pattern.control_changes),
+                automations=list(pattern.automations),
+                metadata={**pattern.metadata, 'groove': groove.name}
+            )
+            for pattern in patterns
+        ]
+
+    def apply_to_library(self, groove: Groove, genre: str,
+                         instruments: Optional[List[str]] = None,
+                         amount: float = 1.0) -> Dict[str, List[SessionClip]]:
+        """A genre's clips, or those of some instruments, with a groove applied"""
+        library = self.pattern_repository.load_patterns(genre)
+        missing = [instrument for instrument in instruments or [] if instrument not in library]
+        if missing:
+            raise ValueError(f"No patterns for {', '.join(missing)} in genre: {genre}")
+        return {
+            instrument: [
+                replace(clip, pattern=pattern)
+                for clip, pattern in zip(clips, self.apply(groove, [clip.pattern for clip in clips], amount))
+            ]
+            for instrument, clips in library.items()
+            if not instruments or instrument in instruments
+        }
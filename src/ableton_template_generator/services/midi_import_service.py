@@ -0,0 +1,240 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.midi_pattern import SessionClip
+from ..repositories.pattern_repository import PatternRepository
+from ..repositories.midi_file import parse_midi
+from ..repositories.cache import content_hash
+
+MIDI_SUFFIXES = {".mid", ".midi"}
+MANIFEST_NAME = "midi_import_manifest.json"
+MANIFEST_VERSION = 1
+
+@dataclass
+class ImportResult:
+    """Outcome of a MIDI import"""
+    decoded: int = 0                     # Files decoded in this run
+    unchanged: int = 0                   # Files reused from the previous import
+    removed: int = 0                     # Files gone since the previous import
+    genres: List[str] = field(default_factory=list)       # Pattern libraries written
+    errors: Dict[str, str] = field(default_factory=dict)  # Source file -> error
+
+@dataclass
+class _SourceFile:
+    genre: str
+    instrument: str
+    mtime_ns: int
+    size: int
+    hash: Optional[str] = None
+    error: Optional[str] = None          # Why the file could not be decoded
+
+def _decode_file(task: Tuple[str, str]) -> Tuple[str, Optional[str], Any, Optional[str]]:
+    """Decode one MIDI file to a clip in its JSON representation.
+
+    Returns (relative path, content hash, clip, error). The hash is None if
+    the file could not be read, and the clip is None if it could not be
+    decoded.
+    """
+    source_dir, relative_path = task
+    path = Path(source_dir) / relative_path
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        return relative_path, None, None, f"{type(e).__name__}: {e}"
+    try:
+        pattern = parse_midi(data, path.stem)
+    except ValueError as e:
+        return relative_path, content_hash(data), None, f"{type(e).__name__}: {e}"
+    clip = SessionClip(name=pattern.name, pattern=pattern, slot_index=0, scene_index=0)
+    return relative_path, content_hash(data), PatternRepository.serialize_clip(clip), None
+
+class MidiImportService:
+    """Imports a directory of MIDI files into per-genre pattern libraries.
+
+    Files are expected at ``<source_dir>/<genre>/<instrument>/.../<name>.mid``
+    and become clips of that instrument in ``<genre>_patterns.json``, ordered
+    by path. A manifest of the imported files' mtime, size and content hash
+    is kept next to the libraries, so that a re-import only decodes files
+    that changed and only rewrites the libraries of genres that changed.
+    """
+
+    def __init__(self, pattern_repository: PatternRepository):
+        self.pattern_repository = pattern_repository
+
+    def manifest_path(self) -> Path:
+        """Get the path of the import manifest"""
+        return self.pattern_repository.patterns_dir / MANIFEST_NAME
+
+    def import_directory(self, source_dir: str, workers: int = 1, full: bool = False,
+                         binary: bool = True) -> ImportResult:
+        """Import MIDI files, decoding them over a process pool when workers > 1"""
+        source_dir = Path(source_dir).resolve()
+        if not source_dir.is_dir():
+            raise ValueError(f"MIDI directory not found: {source_dir}")
+
+        result = ImportResult()
+        sources = self._scan(source_dir, result)
+        previous = {} if full else self._load_manifest(source_dir)
+
+        # Unchanged files keep their manifest entry; touched files whose
+        # content is the same are unchanged too
+        changed = set()
+        for relative_path, source in sources.items():
+            entry = previous.get(relative_path)
+            if entry is None or (entry['genre'], entry['instrument']) != (source.genre, source.instrument):
+                changed.add(relative_path)
+            elif (entry['mtime_ns'], entry['size']) == (source.mtime_ns, source.size):
+                source.hash, source.error = entry['hash'], entry.get('error')
+            else:
+                digest = content_hash((source_dir / relative_path).read_bytes())
+                if digest == entry['hash']:
+                    source.hash, source.error = digest, entry.get('error')
+                else:
+                    changed.add(relative_path)
+
+        removed = [relative_path for relative_path in previous if relative_path not in sources]
+        result.removed = len(removed)
+        affected = {sources[relative_path].genre for relative_path in changed}
+        affected.update(previous[relative_path]['genre'] for relative_path in removed)
+        affected.update(
+            source.genre for source in sources.values()
+            if not self.pattern_repository.json_path(source.genre).exists()
+        )
+
+        # Clips of unchanged files are taken from the current libraries
+        clips: Dict[str, Dict[str, Any]] = {}
+        for genre in affected:
+            clips.update(self._existing_clips(genre))
+        to_decode = sorted(
+            relative_path for relative_path, source in sources.items()
+            if source.genre in affected and (
+                relative_path in changed or (relative_path not in clips and source.error is None)
+            )
+        )
+
+        for relative_path, digest, clip, error in self._decode(source_dir, to_decode, workers):
+            if digest is None:
+                # Unreadable: left out of the manifest, so it is retried
+                result.errors[relative_path] = error
+                del sources[relative_path]
+                continue
+            sources[relative_path].hash = digest
+            sources[relative_path].error = error
+            if clip is not None:
+                clips[relative_path] = clip
+            result.decoded += 1
+        result.unchanged = len(sources) - result.decoded
+        # Files that failed to decode are reported until they change
+        result.errors.update(
+            (relative_path, source.error) for relative_path, source in sources.items()
+            if source.error is not None
+        )
+
+        for genre in sorted(affected):
+            self.pattern_repository.save_library(genre, self._build_library(genre, sources, clips), binary)
+            result.genres.append(genre)
+
+        self._save_manifest(source_dir, sources)
+        return result
+
+    def _scan(self, source_dir: Path, result: ImportResult) -> Dict[str, _SourceFile]:
+        sources = {}
+        for path in sorted(source_dir.rglob('*')):
+            if path.suffix.lower() not in MIDI_SUFFIXES or not path.is_file():
+                continue
+            relative_path = path.relative_to(source_dir).as_posix()
+            parts = path.relative_to(source_dir).parts
+            if len(parts) < 3:
+                result.errors[relative_path] = "Expected <genre>/<instrument>/<file>"
+                continue
+            stat = path.stat()
+            sources[relative_path] = _SourceFile(
+                genre=parts[0],
+                instrument=parts[1],
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size
+            )
+        return sources
+
+    def _decode(self, source_dir: Path, relative_paths: List[str], workers: int) -> List[Tuple]:
+        tasks = [(str(source_dir), relative_path) for relative_path in relative_paths]
+        if workers <= 1 or len(tasks) <= 1:
+            return [_decode_file(task) for task in tasks]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_decode_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    def _existing_clips(self, genre: str) -> Dict[str, Dict[str, Any]]:
+        """Clips of a genre's current library, by source file"""
+        try:
+            with open(self.pattern_repository.json_path(genre), 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {
+            clip["source"]: clip
+            for section in data.get("patterns", {}).values()
+            for clip in section["clips"]
+            if "source" in clip
+        }
+
+    def _build_library(self, genre: str, sources: Dict[str, _SourceFile],
+                       clips: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        instruments: Dict[str, List[Dict[str, Any]]] = {}
+        for relative_path in sorted(sources):
+            source = sources[relative_path]
+            if source.genre != genre or source.error is not None:
+                continue
+            instrument_clips = instruments.setdefault(source.instrument, [])
+            clip = dict(clips[relative_path])
+            clip["slot_index"] = clip["scene_index"] = len(instrument_clips)
+            clip["source"] = relative_path
+            instrument_clips.append(clip)
+        return {
+            "patterns": {
+                instrument: {"clips": instrument_clips}
+                for instrument, instrument_clips in sorted(instruments.items())
+            }
+        }
+
+    def _load_manifest(self, source_dir: Path) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path(), 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('source_dir') != str(source_dir):
+            return {}
+        return manifest['files']
+
+    def _save_manifest(self, source_dir: Path, sources: Dict[str, _SourceFile]) -> None:
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'source_dir': str(source_dir),
+            'files': {
+                relative_path: {
+                    'genre': source.genre,
+                    'instrument': source.instrument,
+                    'mtime_ns': source.mtime_ns,
+                    'size': source.size,
+                    'hash': source.hash,
+                    'error': source.error
+                }
+                for relative_path, source in sorted(sources.items())
+            }
+        }
+        manifest_path = self.manifest_path()
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=manifest_path.parent, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, manifest_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -9,8 +9,7 @@ class PatternService:
     def get_patterns_for_track(self, genre: str, track_name: str) -> List[SessionClip]:
         """Get all patterns for a specific track in a genre"""
         try:
-            patterns = self.pattern_repository.load_patterns(genre)
-            return patterns.get(track_name, [])
+            return self.pattern_repository.load_instrument_patterns(genre, track_name)
         except ValueError:
             return []
 
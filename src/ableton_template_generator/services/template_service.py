@@ -1,20 +1,63 @@
-from typing import List, Dict, Set
+import hashlib
+import json
+from typing import List, Dict, Set, Optional, Tuple
 
 from ..models.timeline import TimelineMarker
 from ..models.template import Template
 from ..models.group import Group
-from ..models.track import Track, TrackType
+from ..models.track import Track, TrackType, ColorCode
 from ..repositories.template_repository import TemplateRepository
+from ..repositories.disk_cache import DiskCache
+
+# Part of the merge cache key: bump whenever merge_templates output changes
+MERGE_ALGORITHM_VERSION = 1
+
+class _TrackIndex:
+    """Hash index of a group's tracks by the attributes used for similarity.
+
+    Two tracks are similar (serve the same purpose) when they have the same
+    color and compatible types: the same type, or either of them BOTH.
+    find_similar returns the first similar track in list order, with one
+    lookup per reference track.
+    """
+
+    def __init__(self, tracks: List[Track]):
+        first_by_color_and_type: Dict[Tuple[ColorCode, TrackType], int] = {}
+        for index, track in enumerate(tracks):
+            first_by_color_and_type.setdefault((track.color, track.type), index)
+
+        # Resolve type compatibility once per (color, type) pair
+        self.similar: Dict[Tuple[ColorCode, TrackType], Track] = {}
+        for color in {color for color, _ in first_by_color_and_type}:
+            first_by_type = {
+                track_type: first_by_color_and_type.get((color, track_type))
+                for track_type in TrackType
+            }
+            for track_type in TrackType:
+                if track_type == TrackType.BOTH:
+                    candidates = first_by_type.values()
+                else:
+                    candidates = (first_by_type[track_type], first_by_type[TrackType.BOTH])
+                candidates = [index for index in candidates if index is not None]
+                if candidates:
+                    self.similar[(color, track_type)] = tracks[min(candidates)]
+
+    def find_similar(self, reference: Track) -> Optional[Track]:
+        return self.similar.get((reference.color, reference.type))
 
 class TemplateService:
-    def __init__(self, repository: TemplateRepository):
+    def __init__(self, repository: TemplateRepository, merge_cache: Optional[DiskCache] = None):
         self.repository = repository
+        self.merge_cache = merge_cache
 
     def create_template(self, genres: List[str]) -> Template:
         """Create a template based on one or more genres"""
         if not genres:
             raise ValueError("At least one genre must be specified")
 
+        if self.merge_cache is not None and len(genres) > 1:
+            return self._create_merged_template_cached(genres)
+
         templates = []
         for genre in genres:
             try:
@@ -31,6 +74,46 @@ class TemplateService:
 
         return self.merge_templates(templates)
 
+    def _create_merged_template_cached(self, genres: List[str]) -> Template:
+        """Create a merged template, reusing a previous merge of the same sources"""
+        # The key is built from the cached templates' content hashes, so a hit
+        # costs no copy. Templates are only copied when they must be merged,
+        # and those are the ones the key was built from, even if a file changes
+        sources = []
+        cached_templates = []
+        for genre in genres:
+            genre = genre.strip().lower()
+            try:
+                template, digest = self.repository.cached_template_with_hash(genre)
+            except ValueError as e:
+                print(f"Warning: {str(e)}")
+                continue
+            sources.append((genre, digest))
+            cached_templates.append(template)
+
+        if not sources:
+            raise ValueError("No valid templates found for the specified genres")
+
+        key = self._merge_cache_key(sources)
+        cached = self.merge_cache.get(key)
+        if cached is not None:
+            return self.repository.deserialize(cached)
+
+        templates = [self.repository.copy_template(template) for template in cached_templates]
+        template = templates[0] if len(templates) == 1 else self.merge_templates(templates)
+        self.merge_cache.put(key, self.repository.serialize(template))
+        return template
+
+    def _merge_cache_key(self, sources: List[Tuple[str, str]]) -> str:
+        """Key a merge on its genres, their template content and the algorithm version"""
+        # Genre order is kept: the first template is the reference for the merge
+        key_data = {
+            'genres': [genre for genre, _ in sources],
+            'sources': [digest for _, digest in sources],
+            'version': MERGE_ALGORITHM_VERSION
+        }
+        return hashlib.sha256(json.dumps(key_data).encode('utf-8')).hexdigest()
+
     def merge_templates(self, templates: List[Template]) -> Template:
         """Merge multiple templates into one, finding common elements"""
         if not templates:
@@ -59,31 +142,24 @@ class TemplateService:
         common_groups = []
         reference_groups = templates[0].groups
 
+        # Groups are similar (serve the same purpose) when they share a color,
+        # so index each template's groups by color once, keeping the first
+        group_indexes = []
+        for template in templates:
+            by_color: Dict[ColorCode, Group] = {}
+            for group in template.groups:
+                by_color.setdefault(group.color, group)
+            group_indexes.append(by_color)
+
         for ref_group in reference_groups:
             # Check if similar group exists in all other templates
-            if all(self._find_similar_group(ref_group, t.groups) for t in templates[1:]):
-                merged_group = self._merge_similar_groups(
-                    [self._find_similar_group(ref_group, t.groups) for t in templates]
-                )
+            similar_groups = [by_color.get(ref_group.color) for by_color in group_indexes]
+            if all(similar_groups[1:]):
+                merged_group = self._merge_similar_groups(similar_groups)
                 common_groups.append(merged_group)
 
         return common_groups
 
-    def _find_similar_group(self, reference: Group, groups: List[Group]) -> Group:
-        """Find a group similar to the reference in a list of groups"""
-        for group in groups:
-            if self._are_groups_similar(reference, group):
-                return group
-        return None
-
-    def _are_groups_similar(self, group1: Group, group2: Group) -> bool:
-        """Check if two groups are similar (same purpose)"""
-        # Groups are considered similar if they have the same color
-        # and similar names or similar track types
-        if group1.color == group2.color:
-            return True
-        return False
-
     def _merge_similar_groups(self, groups: List[Group]) -> Group:
         """Merge similar groups into one"""
         if not groups:
@@ -106,13 +182,11 @@ class TemplateService:
         """Find tracks that appear in all groups"""
         common_tracks = []
         reference_tracks = groups[0].tracks
+        track_indexes = [_TrackIndex(group.tracks) for group in groups[1:]]
 
         for ref_track in reference_tracks:
             # Check if similar track exists in all other groups
-            similar_tracks = [
-                self._find_similar_track(ref_track, group.tracks)
-                for group in groups[1:]
-            ]
+            similar_tracks = [index.find_similar(ref_track) for index in track_indexes]
             
             if all(similar_tracks):
                 merged_track = self._merge_similar_tracks([ref_track] + similar_tracks)
@@ -120,22 +194,6 @@ class TemplateService:
 
         return common_tracks
 
-    def _find_similar_track(self, reference: Track, tracks: List[Track]) -> Track:
-        """Find a track similar to the reference in a list of tracks"""
-        for track in tracks:
-            if self._are_tracks_similar(reference, track):
-                return track
-        return None
-
-    def _are_tracks_similar(self, track1: Track, track2: Track) -> bool:
-        """Check if two tracks are similar (same purpose)"""
-        # Tracks are considered similar if they have the same color
-        # and compatible types
-        if track1.color == track2.color:
-            if track1.type == track2.type or track1.type.BOTH in (track1.type, track2.type):
-                return True
-        return False
-
     def _merge_similar_tracks(self, tracks: List[Track]) -> Track:
         """Merge similar tracks into one"""
         if not tracks:
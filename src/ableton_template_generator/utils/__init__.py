@@ -1,13 +1,15 @@
 """Utility functions and helpers."""
 
-from .validators import (
-    validate_template,
-    validate_group,
-    validate_track
-)
+from .lazy import lazy_exports
 
 __all__ = [
     'validate_template',
     'validate_group',
     'validate_track'
-]
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'validate_template': '.validators',
+    'validate_group': '.validators',
+    'validate_track': '.validators'
+})
@@ -0,0 +1,27 @@
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Tuple
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` importing exported names on first access (PEP 562).
+
+    ``exports`` maps each name to the module defining it, relative to
+    ``package``. A package using them only pays for the submodules its
+    callers actually use:
+
+        __getattr__, __dir__ = lazy_exports(__name__, {'Track': '.track'})
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module, package), name)
+        # Later lookups find the name without calling __getattr__ again
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__